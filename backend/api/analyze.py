@@ -2,28 +2,148 @@
 POST /analyze endpoint for IV curve analysis.
 """
 
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cachetools import LRUCache
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Optional
+from typing import NamedTuple, Optional
 from uuid import UUID
 
+import numpy as np
+
+from backend.config import SOLVER_WORKERS
+from backend.api.responses import ORJSONResponse
 from backend.tools.manage_storage import (
     get_measurement,
     get_import_record,
     list_analyses_for_measurement,
 )
 from backend.tools.ingest_file import extract_iv_data
-from backend.tools.solve_iv_curve import analyze_measurement
-from backend.models.entities import AnalysisMode, ModelType, AnalysisStatus, MeasurementType
+from backend.tools.solve_iv_curve import analyze_measurement, parameters_to_initial_guess
+from backend.models.entities import (
+    Analysis,
+    AnalysisMode,
+    AnalysisStatus,
+    Measurement,
+    MeasurementType,
+    ModelType,
+)
 from backend.services.physics_service import extract_ideality_from_slope
 
 
 router = APIRouter()
+log = logging.getLogger("helios.analyze")
+
+# CPU-bound fitting runs out of the event loop in a per-web-worker process
+# pool, sized by config.SOLVER_WORKERS so that WEB_CONCURRENCY pools together
+# do not oversubscribe the cores. Solver processes are spawned lazily on first
+# submit and inherit the determinism env vars from this process.
+
+# Solver processes are started by a fork server (spawned where there is
+# none) instead of being forked from a web worker, which is multi-threaded:
+# a forked copy can inherit locks other threads held at the moment of fork.
+SOLVER_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _new_solver_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=SOLVER_WORKERS,
+        mp_context=multiprocessing.get_context(SOLVER_START_METHOD),
+    )
+
+
+SOLVER_EXECUTOR = _new_solver_executor()
+
+
+# Process that imported this module (the gunicorn master under --preload)
+_POOL_OWNER_PID = os.getpid()
+
+
+def _reset_solver_executor() -> None:
+    """
+    Give a forked web worker its own solver pool.
+    
+    With gunicorn --preload every web worker is forked from the process that
+    imported this module; the inherited pool's call/result queues would be
+    shared between workers. Anything a worker forks in turn keeps what it
+    inherited (solver processes themselves come from the fork server).
+    """
+    global SOLVER_EXECUTOR
+    if os.getppid() != _POOL_OWNER_PID:
+        return
+    SOLVER_EXECUTOR = _new_solver_executor()
+
+
+def _replace_broken_executor(broken: ProcessPoolExecutor) -> None:
+    """
+    Swap in a fresh solver pool after `broken` lost a process.
+    
+    A solver process that dies (e.g. killed for memory) breaks its pool for
+    good; every request failing on it lands here, and only the first one
+    replaces it.
+    """
+    global SOLVER_EXECUTOR
+    if SOLVER_EXECUTOR is broken:
+        log.warning("Solver pool is broken; starting a new one")
+        SOLVER_EXECUTOR = _new_solver_executor()
+        broken.shutdown(wait=False)
+
+
+os.register_at_fork(after_in_child=_reset_solver_executor)
+
+
+class _AnalyzeJob(NamedTuple):
+    """Keyword arguments of one analyze_measurement call."""
+    measurement: Measurement
+    V: np.ndarray
+    I: np.ndarray
+    mode: AnalysisMode
+    model_type: ModelType
+    area_cm2_override: Optional[float] = None
+    temperature_c_override: Optional[float] = None
+    initial_guess: Optional[np.ndarray] = None
+
+
+async def _solve(job: _AnalyzeJob) -> Analysis:
+    """
+    Run one fit in the solver pool.
+    
+    Every request gets its own pool task and future: a quick fit is never
+    held back by a slow one submitted alongside it, and a lone request is
+    dispatched at once rather than after a batching window. Once every
+    worker is busy the pool queues fits itself. If the request is cancelled
+    (client gone) before its fit starts, the fit is dropped from the queue.
+    A fit caught by a broken pool is retried once on its replacement.
+    """
+    loop = asyncio.get_running_loop()
+    fit = functools.partial(analyze_measurement, **job._asdict())
+    executor = SOLVER_EXECUTOR
+    try:
+        return await loop.run_in_executor(executor, fit)
+    except BrokenProcessPool:
+        _replace_broken_executor(executor)
+        return await loop.run_in_executor(SOLVER_EXECUTOR, fit)
+
+
+# Last converged solver vector per (measurement, model), used to warm-start
+# Exploration re-analyses (e.g. while tweaking area/temperature overrides).
+# Two-diode fits are not warm-started: I_02 is not part of ExtractedParameters.
+WARM_START_CACHE_SIZE = 1024
+_warm_starts: LRUCache = LRUCache(maxsize=WARM_START_CACHE_SIZE)
 
 
 class AnalyzeRequest(BaseModel):
     """Request body for analysis."""
-    measurement_id: str
+    measurement_id: UUID
     mode: str = "Exploration"  # "Exploration" or "Reference"
     model_type: str = "OneDiode"  # "OneDiode" or "TwoDiode"
     area_cm2: Optional[float] = None
@@ -52,107 +172,140 @@ class AnalyzeResponse(BaseModel):
     error_message: Optional[str] = None
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
+# Every response field, in declared order, defaulting to None
+_RESPONSE_TEMPLATE = dict.fromkeys(AnalyzeResponse.model_fields)
+
+
+# The payload is assembled from already-validated entities, so it is returned
+# as-is instead of being re-validated through response_model.
+@router.post(
+    "/analyze",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": AnalyzeResponse}},
+)
 async def analyze_endpoint(request: AnalyzeRequest):
     """Analyze an IV curve measurement."""
     try:
         # Get measurement
-        measurement = get_measurement(UUID(request.measurement_id))
+        measurement = get_measurement(request.measurement_id)
         if measurement is None:
-            print(f"[Analyze Error] Measurement not found: {request.measurement_id}")
+            log.warning("Measurement not found: %s", request.measurement_id)
             raise HTTPException(status_code=404, detail="Measurement not found")
         
         # Get import record
         import_record = get_import_record(measurement.import_record_id)
         if import_record is None:
-            print(f"[Analyze Error] Import record not found: {measurement.import_record_id}")
+            log.warning("Import record not found: %s", measurement.import_record_id)
             raise HTTPException(status_code=404, detail="Import record not found")
         
-        # Extract IV data
+        loop = asyncio.get_running_loop()
+        
+        # Extract IV data (file I/O and parsing: a thread, not a solver process)
         target_map = measurement.column_map or import_record.column_map
         try:
-            V, I = extract_iv_data(measurement, target_map)
+            V, I = await loop.run_in_executor(
+                None, extract_iv_data, measurement, target_map
+            )
         except Exception as e:
-            print(f"[Analyze Error] Data extraction failed: {e}")
+            log.warning("Data extraction failed: %s", e)
             raise ValueError(f"Data extraction failed: {e}")
             
-        print(f"[Analyze Trace] Input data shape: {V.shape}, Mapping: {target_map.voltage_column}/{target_map.current_column}")
+        log.debug(
+            "Input data shape: %s, Mapping: %s/%s",
+            V.shape, target_map.voltage_column, target_map.current_column,
+        )
         
         # Parse settings
         mode = AnalysisMode(request.mode)
         model_type = ModelType(request.model_type)
         
-        # Apply metadata overrides if provided
-        if request.area_cm2 is not None:
-            measurement = measurement.model_copy(update={
-                "metadata": measurement.metadata.model_copy(update={"cell_area_cm2": request.area_cm2})
-            })
-        if request.temperature_k is not None:
-            measurement = measurement.model_copy(update={
-                "metadata": measurement.metadata.model_copy(update={"temperature_c": request.temperature_k - 273.15})
-            })
+        # Metadata overrides apply to this fit only; the stored measurement is untouched
+        temperature_c_override = (
+            request.temperature_k - 273.15 if request.temperature_k is not None else None
+        )
+        temperature_c = (
+            temperature_c_override if temperature_c_override is not None
+            else measurement.metadata.temperature_c
+        )
+        
+        warm_key = (measurement.id, model_type)
+        use_warm_start = mode == AnalysisMode.EXPLORATION and model_type == ModelType.ONE_DIODE
         
         # Run analysis
-        analysis = analyze_measurement(
-            measurement=measurement,
-            V=V,
-            I=I,
-            mode=mode,
-            model_type=model_type,
+        analysis = await _solve(
+            _AnalyzeJob(
+                measurement=measurement,
+                V=V,
+                I=I,
+                mode=mode,
+                model_type=model_type,
+                area_cm2_override=request.area_cm2,
+                temperature_c_override=temperature_c_override,
+                initial_guess=_warm_starts.get(warm_key) if use_warm_start else None,
+            )
         )
         
+        # Only converged fits seed later searches
+        if use_warm_start and analysis.status == AnalysisStatus.VALID and analysis.parameters:
+            _warm_starts[warm_key] = parameters_to_initial_guess(
+                analysis.parameters,
+                request.area_cm2 if request.area_cm2 is not None else measurement.metadata.cell_area_cm2,
+                measurement.metadata.measurement_type,
+            )
+        
         if analysis.status == AnalysisStatus.INVALID:
-            print(f"[Analyze Warning] Physics engine returned invalid status: {analysis.error_message}")
+            log.warning("Physics engine returned invalid status: %s", analysis.error_message)
         
         # Build response
-        response = AnalyzeResponse(
-            analysis_id=str(analysis.id),
-            status=analysis.status.value,
-            mode=analysis.mode.value,
-            result_hash=analysis.result_hash,
-            error_message=analysis.error_message,
-        )
+        response = dict(_RESPONSE_TEMPLATE)
+        response["analysis_id"] = str(analysis.id)
+        response["status"] = analysis.status.value
+        response["mode"] = analysis.mode.value
+        response["result_hash"] = analysis.result_hash
+        response["error_message"] = analysis.error_message
         
         if analysis.parameters:
-            response.j_sc = analysis.parameters.j_sc
-            response.v_oc = analysis.parameters.v_oc
-            response.ff = analysis.parameters.ff
-            response.pce = analysis.parameters.pce
-            response.r_s = analysis.parameters.r_s
-            response.r_sh = analysis.parameters.r_sh
-            response.n_ideality = analysis.parameters.n_ideality
+            response["j_sc"] = analysis.parameters.j_sc
+            response["v_oc"] = analysis.parameters.v_oc
+            response["ff"] = analysis.parameters.ff
+            response["pce"] = analysis.parameters.pce
+            response["r_s"] = analysis.parameters.r_s
+            response["r_sh"] = analysis.parameters.r_sh
+            response["n_ideality"] = analysis.parameters.n_ideality
             
             # Extract additional physics with light-bias compensation if applicable
             is_light = measurement.metadata.measurement_type == MeasurementType.LIGHT
-            response.n_slope = extract_ideality_from_slope(
-                V, I, 
-                temp_c=measurement.metadata.temperature_c,
+            # One vectorised slope fit: cheaper inline than a pool round-trip
+            response["n_slope"] = extract_ideality_from_slope(
+                V, I,
+                temp_c=temperature_c,
                 is_light=is_light,
-                j_sc=analysis.parameters.j_sc
+                j_sc=analysis.parameters.j_sc,
             )
-            response.n_dark = analysis.parameters.n_dark
-            response.i_0_dark = analysis.parameters.i_0_dark
-            response.r_s_dark = analysis.parameters.r_s_dark
-            response.r_sh_dark = analysis.parameters.r_sh_dark
+            response["n_dark"] = analysis.parameters.n_dark
+            response["i_0_dark"] = analysis.parameters.i_0_dark
+            response["r_s_dark"] = analysis.parameters.r_s_dark
+            response["r_sh_dark"] = analysis.parameters.r_sh_dark
         
-        return response
+        return ORJSONResponse(response)
         
+    except HTTPException:
+        raise
     except ValueError as e:
-        print(f"[Analyze 400] {e}")
+        log.warning("Analysis rejected: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"[Analyze 500] Unexpected error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
 
 
-@router.get("/analyses/{measurement_id}")
-async def list_analyses(measurement_id: str):
+@router.get("/analyses/{measurement_id}", response_class=ORJSONResponse)
+async def list_analyses(measurement_id: UUID):
     """List all analyses for a measurement."""
     try:
-        analyses = list_analyses_for_measurement(UUID(measurement_id))
-        return [
+        analyses = list_analyses_for_measurement(measurement_id)
+        return ORJSONResponse([
             {
                 "id": str(a.id),
                 "timestamp": a.timestamp.isoformat(),
@@ -161,6 +314,6 @@ async def list_analyses(measurement_id: str):
                 "result_hash": a.result_hash,
             }
             for a in analyses
-        ]
+        ])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
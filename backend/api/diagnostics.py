@@ -2,22 +2,45 @@
 Helios Core — Diagnostics API Routes
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from functools import lru_cache
+
+from fastapi import APIRouter, HTTPException, Response
 from uuid import UUID
 import numpy as np
 
+from backend.api.responses import ORJSONResponse
 from backend.tools.manage_storage import get_analysis, get_measurement, get_import_record
 from backend.tools.ingest_file import extract_iv_data
 from backend.services.diagnostic_service import DiagnosticReport
-from backend.tools.solve_iv_curve import one_diode_equation, two_diode_equation
-from backend.models.entities import ModelType
+from backend.tools.solve_iv_curve import reconstruct_fitted_current
 
 router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
 
-async def _get_base_diagnostic_data(analysis_id: str):
+# Analyses are immutable, so the reconstructed curve is shared by every
+# diagnostics stage of the same analysis.
+DIAGNOSTIC_DATA_CACHE_SIZE = 256
+
+
+async def _get_base_diagnostic_data(analysis_id: UUID):
     """Helper to fetch common data for diagnostics."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _load_diagnostic_data, analysis_id)
+
+
+def _report_response(report: DiagnosticReport) -> Response:
+    """Send the report using the JSON bytes produced while hashing it."""
+    content, body = report.generate_report_bytes()
+    if body is None:
+        return ORJSONResponse(content)
+    return Response(body, media_type="application/json")
+
+
+@lru_cache(maxsize=DIAGNOSTIC_DATA_CACHE_SIZE)
+def _load_diagnostic_data(analysis_id: UUID):
+    """Fetch analysis/measurement and rebuild (V, I_measured, I_fitted) once per analysis."""
     # 1. Fetch Analysis
-    analysis = get_analysis(UUID(analysis_id))
+    analysis = get_analysis(analysis_id)
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
@@ -34,67 +57,39 @@ async def _get_base_diagnostic_data(analysis_id: str):
     
     V, I_measured = extract_iv_data(measurement, target_map)
     
-    # 3. Reconstruct Fitted Curve
-    p = analysis.parameters
-    T_k = measurement.metadata.temperature_c + 273.15
-    area = measurement.metadata.cell_area_cm2
-    
-    if analysis.solver_config.model_type == ModelType.ONE_DIODE:
-        I_fitted = one_diode_equation(
-            V=V,
-            I_ph=p.i_ph,
-            I_0=p.i_0,
-            n=p.n_ideality,
-            R_s=p.r_s / area,
-            R_sh=p.r_sh / area,
-            T_k=T_k
-        )
+    # 3. Fitted Curve: stored at fit time; rebuilt for analyses that predate it
+    if analysis.fitted_current is not None and len(analysis.fitted_current) == V.nbytes:
+        I_fitted = np.frombuffer(analysis.fitted_current, dtype=np.float64)
     else:
-        I_fitted = two_diode_equation(
-            V=V,
-            I_ph=p.i_ph,
-            I_01=p.i_0,
-            n1=p.n_ideality,
-            I_02=0.0,
-            n2=p.n2_ideality or 2.0,
-            R_s=p.r_s / area,
-            R_sh=p.r_sh / area,
-            T_k=T_k
+        I_fitted = reconstruct_fitted_current(
+            V,
+            analysis.parameters,
+            analysis.solver_config.model_type,
+            measurement.metadata.cell_area_cm2,
+            measurement.metadata.temperature_c,
         )
     
+    # Cached arrays are shared between requests
+    for arr in (V, I_measured, I_fitted):
+        arr.setflags(write=False)
+    
     return analysis, measurement, V, I_measured, I_fitted
 
-@router.get("/{analysis_id}")
-async def get_diagnostics(analysis_id: str):
-    """Get comprehensive diagnostics (Legacy/Fallback)."""
-    try:
-        analysis, measurement, V, I_measured, I_fitted = await _get_base_diagnostic_data(analysis_id)
-        
-        report = DiagnosticReport(analysis_id=str(analysis.id), mode=analysis.mode.value)
-        report.analyze_residuals(voltage=V, measured=I_measured, fitted=I_fitted)
-        
-        diag_params = {'n': analysis.parameters.n_ideality, 'Rs': analysis.parameters.r_s, 'Rsh': analysis.parameters.r_sh}
-        bounds = {'n': (0.8, 2.5), 'Rs': (0, 1000), 'Rsh': (1.0, 1e9)}
-        report.analyze_boundary_stress(diag_params, bounds)
-        
-        return report.generate_report()
-    except HTTPException as he: raise he
-    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/{analysis_id}/quick")
-async def get_quick_diagnostics(analysis_id: str):
+@router.get("/{analysis_id}/quick", response_class=ORJSONResponse)
+async def get_quick_diagnostics(analysis_id: UUID):
     """Quick stage: Residuals only."""
     try:
         analysis, measurement, V, I_measured, I_fitted = await _get_base_diagnostic_data(analysis_id)
         report = DiagnosticReport(analysis_id=str(analysis.id), mode=analysis.mode.value)
         report.analyze_residuals(voltage=V, measured=I_measured, fitted=I_fitted)
-        return report.generate_report()
+        return _report_response(report)
     except HTTPException as he: raise he
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{analysis_id}/full")
-async def get_full_diagnostics(analysis_id: str):
-    """Full stage: Residuals + Boundary Stress + Audit."""
+@router.get("/{analysis_id}", response_class=ORJSONResponse)
+@router.get("/{analysis_id}/full", response_class=ORJSONResponse)
+async def get_full_diagnostics(analysis_id: UUID):
+    """Full stage: Residuals + Boundary Stress + Audit. Also served as the legacy endpoint."""
     try:
         analysis, measurement, V, I_measured, I_fitted = await _get_base_diagnostic_data(analysis_id)
         report = DiagnosticReport(analysis_id=str(analysis.id), mode=analysis.mode.value)
@@ -104,6 +99,6 @@ async def get_full_diagnostics(analysis_id: str):
         bounds = {'n': (0.8, 2.5), 'Rs': (0, 1000), 'Rsh': (1.0, 1e9)}
         report.analyze_boundary_stress(diag_params, bounds)
         
-        return report.generate_report()
+        return _report_response(report)
     except HTTPException as he: raise he
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
@@ -4,17 +4,76 @@ Helios Core — Export API Routes
 GET /export/{analysis_id} endpoint for Supplementary Bundle generation.
 """
 
+import asyncio
+import functools
+import os
+from pathlib import Path
+from typing import Optional
+
+from cachetools import LRUCache
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from uuid import UUID
 
+from backend.models.entities import Analysis, Measurement
 from backend.tools.manage_storage import get_analysis, get_measurement
-from backend.tools.generate_bundle import generate_supplementary_bundle, generate_results_csv
-from fastapi import Response
+from backend.tools.generate_bundle import generate_supplementary_bundle, iter_results_csv
 
 
 router = APIRouter()
 
+# Bundles derive from write-once analyses, so a generated zip is re-served
+# until the analysis result_hash differs or a recalculation is requested.
+BUNDLE_CACHE_SIZE = 256
+_bundle_cache: LRUCache = LRUCache(maxsize=BUNDLE_CACHE_SIZE)
+# One build per (analysis id, result_hash): concurrent misses await the same future
+_bundle_builds: dict[tuple[str, Optional[str]], asyncio.Future] = {}
+
+
+def _start_bundle_build(analysis: Analysis, measurement: Measurement) -> asyncio.Future:
+    """Return the in-flight build for this analysis, starting one if there is none."""
+    build_key = (str(analysis.id), analysis.result_hash)
+    build = _bundle_builds.get(build_key)
+    if build is not None:
+        return build
+    
+    loop = asyncio.get_running_loop()
+    build = loop.run_in_executor(
+        None,
+        functools.partial(generate_supplementary_bundle, analysis=analysis, measurement=measurement),
+    )
+    _bundle_builds[build_key] = build
+    
+    def _finish(done: asyncio.Future) -> None:
+        if _bundle_builds.get(build_key) is done:
+            del _bundle_builds[build_key]
+        if not done.cancelled() and done.exception() is None:
+            _bundle_cache[build_key[0]] = (build_key[1], done.result())
+    
+    build.add_done_callback(_finish)
+    return build
+
+
+async def _get_bundle(
+    analysis: Analysis,
+    measurement: Measurement,
+    force: bool = False,
+) -> tuple[Path, os.stat_result]:
+    """Return a bundle path (and its stat) for the analysis, building it off the event loop if needed."""
+    key = str(analysis.id)
+    cached = _bundle_cache.get(key)
+    if cached is not None and not force:
+        result_hash, bundle_path = cached
+        if result_hash == analysis.result_hash:
+            try:
+                return bundle_path, os.stat(bundle_path)
+            except FileNotFoundError:
+                pass
+    
+    # Shielded so one client disconnecting does not cancel the build others await
+    bundle_path = await asyncio.shield(_start_bundle_build(analysis, measurement))
+    return bundle_path, os.stat(bundle_path)
+
 
 from pydantic import BaseModel
 from typing import Optional
@@ -31,49 +90,57 @@ class VerifyRequest(BaseModel):
     hash: str
 
 @router.get("/export/{analysis_id}")
-async def export_bundle(analysis_id: str):
+async def export_bundle(analysis_id: UUID):
     """Generate and download Supplementary Bundle (Legacy)."""
     try:
-        analysis = get_analysis(UUID(analysis_id))
+        analysis = get_analysis(analysis_id)
         if analysis is None: raise HTTPException(status_code=404, detail="Analysis not found")
         measurement = get_measurement(analysis.measurement_id)
         if measurement is None: raise HTTPException(status_code=404, detail="Measurement not found")
-        bundle_path = generate_supplementary_bundle(analysis=analysis, measurement=measurement)
-        return FileResponse(path=bundle_path, media_type="application/zip", filename=f"helios_bundle_{analysis_id[:8]}.zip")
+        bundle_path, stat_result = await _get_bundle(analysis, measurement)
+        return FileResponse(path=bundle_path, stat_result=stat_result, media_type="application/zip", filename=f"helios_bundle_{str(analysis_id)[:8]}.zip")
+    except HTTPException: raise
     except Exception as e: raise HTTPException(status_code=500, detail=f"Export failed: {e}")
 
 @router.post("/export/{analysis_id}/generate")
-async def generate_export_integrity(analysis_id: str, request: ExportRequest):
+async def generate_export_integrity(analysis_id: UUID, request: ExportRequest):
     """Fresh calculation bundle generation with options."""
     try:
-        analysis = get_analysis(UUID(analysis_id))
+        analysis = get_analysis(analysis_id)
         if analysis is None: raise HTTPException(status_code=404, detail="Analysis not found")
         measurement = get_measurement(analysis.measurement_id)
         if measurement is None: raise HTTPException(status_code=404, detail="Measurement not found")
         
         # In a real scenario, request.recalculate would trigger a re-run of the solver
-        # For now, we generate a fresh bundle file from the existing analysis parameters
-        bundle_path = generate_supplementary_bundle(analysis=analysis, measurement=measurement)
+        # For now, it forces a fresh bundle file from the existing analysis parameters
+        bundle_path, stat_result = await _get_bundle(analysis, measurement, force=request.recalculate)
         
         return FileResponse(
             path=bundle_path, 
+            stat_result=stat_result,
             media_type="application/zip", 
-            filename=f"helios_export_{analysis_id[:8]}.zip"
+            filename=f"helios_export_{str(analysis_id)[:8]}.zip"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/export/{analysis_id}/verify")
-async def verify_export_hash(analysis_id: str, request: VerifyRequest):
+async def verify_export_hash(analysis_id: UUID, request: VerifyRequest):
     """Simple verification placeholder."""
     return {"status": "verified", "hash": request.hash}
 
 @router.get("/export/{analysis_id}/csv")
-async def export_results_csv(analysis_id: str):
+async def export_results_csv(analysis_id: UUID):
     """Generate and download only the results.csv."""
     try:
-        analysis = get_analysis(UUID(analysis_id))
+        analysis = get_analysis(analysis_id)
         if analysis is None: raise HTTPException(status_code=404, detail="Analysis not found")
-        csv_content = generate_results_csv(analysis)
-        return Response(content=csv_content, media_type="text/csv", headers={"Content-Disposition": f"attachment; filename=helios_results_{analysis_id[:8]}.csv"})
+        return StreamingResponse(
+            iter_results_csv(analysis),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=helios_results_{str(analysis_id)[:8]}.csv"},
+        )
+    except HTTPException: raise
     except Exception as e: raise HTTPException(status_code=500, detail=f"CSV Export failed: {e}")
@@ -4,6 +4,9 @@ Helios Core — Ingestion API Routes
 POST /ingest endpoint for file upload.
 """
 
+import asyncio
+import functools
+
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from pydantic import BaseModel
 from typing import Optional
@@ -49,20 +52,25 @@ async def ingest_file_endpoint(
     Supported formats: .csv, .txt, .xls, .xlsx
     """
     try:
-        content = await file.read()
-        
         metadata = MeasurementMetadata(
             cell_area_cm2=cell_area_cm2,
             temperature_c=temperature_c,
         )
         
-        import_record, measurements = ingest_file(
-            file_content=content,
-            filename=file.filename or "unknown.csv",
-            metadata=metadata,
+        # Reading the spooled upload and parsing both happen in a worker thread
+        loop = asyncio.get_running_loop()
+        import_record, measurements = await loop.run_in_executor(
+            None,
+            functools.partial(
+                ingest_file,
+                file_content=file.file,
+                filename=file.filename or "unknown.csv",
+                metadata=metadata,
+            ),
         )
         
-        return IngestResponse(
+        # Fields come straight from freshly validated entities
+        return IngestResponse.model_construct(
             import_record_id=str(import_record.id),
             source_filename=import_record.source_filename,
             hardware_profile=import_record.hardware_profile.value,
@@ -2,27 +2,45 @@
 Helios Core — Data Access API
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
 from uuid import UUID
 import numpy as np
 
-from backend.tools.manage_storage import get_measurement, get_analysis
+from backend.api.responses import ORJSONResponse
+from backend.tools.manage_storage import get_measurement, get_analysis, get_import_record
 from backend.tools.ingest_file import extract_iv_data
 from backend.tools.solve_iv_curve import one_diode_equation, two_diode_equation
 from backend.models.entities import ModelType
 
 router = APIRouter()
 
-@router.get("/measurements/{measurement_id}/data")
-async def get_measurement_data(measurement_id: str, area_cm2: float = None, temperature_k: float = None):
+# Measurements and analyses are write-once (a re-analysis gets a new ID), so
+# computed points never go stale; maxsize bounds memory for polling UIs.
+POINTS_CACHE_SIZE = 1024
+
+PointRows = tuple[tuple[float, float, float], ...]
+
+
+@router.get("/measurements/{measurement_id}/data", response_class=ORJSONResponse)
+async def get_measurement_data(measurement_id: UUID, area_cm2: Optional[float] = None, temperature_k: Optional[float] = None):
     """Get raw data points for a measurement."""
-    measurement = get_measurement(UUID(measurement_id))
+    # A cache miss reads and parses the raw file; keep that off the event loop
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(None, _compute_data_points, measurement_id, area_cm2)
+    return ORJSONResponse([{"voltage": v, "current": j, "power": pw} for v, j, pw in rows])
+
+
+@lru_cache(maxsize=POINTS_CACHE_SIZE)
+def _compute_data_points(measurement_id: UUID, area_cm2: Optional[float]) -> PointRows:
+    """(V, J, P) rows for a measurement, cached per (id, area override)."""
+    measurement = get_measurement(measurement_id)
     if not measurement:
         raise HTTPException(status_code=404, detail="Measurement not found")
     
     # We need the parent import record's column map if not overridden
-    from backend.tools.manage_storage import get_import_record
     import_record = get_import_record(measurement.import_record_id)
     target_map = measurement.column_map or import_record.column_map
     
@@ -31,24 +49,32 @@ async def get_measurement_data(measurement_id: str, area_cm2: float = None, temp
     
     try:
         V, I = extract_iv_data(measurement, target_map)
-        # Convert to current density J (mA/cm2) for consistent display
-        J = I / area * 1000
+        # Convert to current density J (mA/cm2) for consistent display.
+        # One output buffer, same operation order as I / area * 1000.
+        J = np.divide(I, area)
+        np.multiply(J, 1000, out=J)
         
-        points = []
-        for v, j in zip(V, J):
-            points.append({
-                "voltage": float(v),
-                "current": float(j),
-                "power": float(v * j)
-            })
-        return points
+        # Bulk C-level conversion; row shape is what the frontend charts expect
+        return tuple(zip(V.tolist(), J.tolist(), (V * J).tolist()))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/analyses/{analysis_id}/fit")
-async def get_analysis_fit(analysis_id: str, area_cm2: float = None, temperature_k: float = None):
+@router.get("/analyses/{analysis_id}/fit", response_class=ORJSONResponse)
+async def get_analysis_fit(analysis_id: UUID, area_cm2: Optional[float] = None, temperature_k: Optional[float] = None):
     """Get fitted curve points for an analysis."""
-    analysis = get_analysis(UUID(analysis_id))
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(None, _compute_fit_points, analysis_id, area_cm2, temperature_k)
+    return ORJSONResponse([{"voltage": v, "fit_current": j, "fit_power": pw} for v, j, pw in rows])
+
+
+@lru_cache(maxsize=POINTS_CACHE_SIZE)
+def _compute_fit_points(
+    analysis_id: UUID,
+    area_cm2: Optional[float],
+    temperature_k: Optional[float],
+) -> PointRows:
+    """(V, J_fit, P_fit) rows for an analysis, cached per (id, area, temp overrides)."""
+    analysis = get_analysis(analysis_id)
     if not analysis or not analysis.parameters:
         raise HTTPException(status_code=404, detail="Analysis or parameters not found")
     
@@ -57,7 +83,6 @@ async def get_analysis_fit(analysis_id: str, area_cm2: float = None, temperature
         raise HTTPException(status_code=404, detail="Measurement not found")
 
     # Use parent import record's map to get voltage range
-    from backend.tools.manage_storage import get_import_record
     import_record = get_import_record(measurement.import_record_id)
     target_map = measurement.column_map or import_record.column_map
     V_raw, _ = extract_iv_data(measurement, target_map)
@@ -78,16 +103,10 @@ async def get_analysis_fit(analysis_id: str, area_cm2: float = None, temperature
             # Fallback to one-diode if parameters missing
             I_fit = one_diode_equation(V_fit, p.i_ph, p.i_0, p.n_ideality, p.r_s / area, p.r_sh / area, temp_k)
 
-        # Convert to J (mA/cm2)
-        J_fit = I_fit / area * 1000
+        # Convert to J (mA/cm2) in place; I_fit is a fresh solver output
+        J_fit = np.divide(I_fit, area, out=I_fit)
+        np.multiply(J_fit, 1000, out=J_fit)
         
-        points = []
-        for v, j in zip(V_fit, J_fit):
-            points.append({
-                "voltage": float(v),
-                "fit_current": float(j),
-                "fit_power": float(v * j)
-            })
-        return points
+        return tuple(zip(V_fit.tolist(), J_fit.tolist(), (V_fit * J_fit).tolist()))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
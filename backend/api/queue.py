@@ -5,22 +5,33 @@ REST API endpoints for queue management operations.
 Follows FastAPI patterns with proper OpenAPI documentation.
 """
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
+from functools import lru_cache, partial
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from pydantic import BaseModel, Field
 
 from backend.services.queue_service import QueueService
 from backend.models.queue_entities import (
     Service, Counter, Ticket, QueueState, CounterState,
-    ServiceType, CounterStatus, TicketStatus, Priority
+    ServiceType, CounterStatus, TicketStatus, Priority,
+    OptionalTicketAdapter
 )
 
 # Dependency injection
+@lru_cache(maxsize=1)
 def get_queue_service() -> QueueService:
-    """Get queue service instance."""
+    """
+    Get the shared queue service instance.
+    
+    Built once on first use so the schema setup in QueueService.__init__ is
+    not repeated per request and its pooled connections are reused.
+    """
     return QueueService()
 
 # Request/Response models
@@ -60,6 +71,49 @@ class CancelTicketRequest(BaseModel):
 # Router setup
 router = APIRouter()
 
+
+# Hot queue routes return entities the service has already validated, so they
+# are dumped to JSON in pydantic-core here instead of being re-validated
+# through response_model (which stays in the OpenAPI docs via `responses`).
+def _json_response(body: bytes) -> Response:
+    return Response(body, media_type="application/json")
+
+
+# Dashboards poll queue state several times a second. Serialized snapshots are
+# reused for up to QUEUE_STATE_TTL seconds and dropped on any write made through
+# this process; writes from other workers show up once the TTL expires.
+QUEUE_STATE_TTL = 1.0  # seconds
+QUEUE_STATE_CACHE_SIZE = 256
+_queue_state_cache: TTLCache = TTLCache(maxsize=QUEUE_STATE_CACHE_SIZE, ttl=QUEUE_STATE_TTL)
+
+# Bumped by every invalidation. A snapshot whose build overlapped a write may
+# predate it, so it is only stored if the generation did not move meanwhile.
+_queue_state_generation = 0
+
+
+def _invalidate_queue_state() -> None:
+    """Drop cached snapshots after a write made through this process."""
+    global _queue_state_generation
+    _queue_state_generation += 1
+    _queue_state_cache.clear()
+
+
+async def _offload(fn, *args):
+    """Run a blocking QueueService call (SQLite I/O) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(fn, *args))
+
+
+async def _cached_state(key: tuple, build) -> Response:
+    """Serve a queue snapshot from the cache, building and storing it on a miss."""
+    body = _queue_state_cache.get(key)
+    if body is None:
+        generation = _queue_state_generation
+        body = await _offload(build)
+        if generation == _queue_state_generation:
+            _queue_state_cache[key] = body
+    return _json_response(body)
+
 # =============================================================================
 # SERVICE MANAGEMENT ENDPOINTS
 # =============================================================================
@@ -71,7 +125,9 @@ async def create_service(
 ):
     """Create a new service type."""
     try:
-        return service.create_service(request.dict())
+        result = await _offload(service.create_service, request.dict())
+        _invalidate_queue_state()
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -89,7 +145,7 @@ async def get_service(
     service: QueueService = Depends(get_queue_service)
 ):
     """Get service by ID."""
-    result = service._get_service(service_id)
+    result = await _offload(service._get_service, service_id)
     if not result:
         raise HTTPException(status_code=404, detail="Service not found")
     return result
@@ -105,7 +161,9 @@ async def create_counter(
 ):
     """Create a new service counter."""
     try:
-        return service.create_counter(request.dict())
+        result = await _offload(service.create_counter, request.dict())
+        _invalidate_queue_state()
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -123,19 +181,24 @@ async def get_counter(
     service: QueueService = Depends(get_queue_service)
 ):
     """Get counter by ID."""
-    result = service._get_counter(counter_id)
+    result = await _offload(service._get_counter, counter_id)
     if not result:
         raise HTTPException(status_code=404, detail="Counter not found")
     return result
 
-@router.get("/counters/{counter_id}/state", response_model=CounterState, tags=["Counters"])
+@router.get(
+    "/counters/{counter_id}/state",
+    response_model=None,
+    responses={200: {"model": CounterState}},
+    tags=["Counters"],
+)
 async def get_counter_state(
     counter_id: UUID,
     service: QueueService = Depends(get_queue_service)
 ):
     """Get current counter state."""
     try:
-        return service.get_counter_state(counter_id)
+        return _json_response((await _offload(service.get_counter_state, counter_id)).model_dump_json())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -143,7 +206,12 @@ async def get_counter_state(
 # TICKET MANAGEMENT ENDPOINTS
 # =============================================================================
 
-@router.post("/tickets", response_model=Ticket, tags=["Tickets"])
+@router.post(
+    "/tickets",
+    response_model=None,
+    responses={200: {"model": Ticket}},
+    tags=["Tickets"],
+)
 async def create_ticket(
     request: CreateTicketRequest,
     service: QueueService = Depends(get_queue_service)
@@ -158,20 +226,27 @@ async def create_ticket(
             "notes": request.notes,
             "custom_data": request.custom_data
         }
-        return service.generate_ticket(request.service_id, customer_data)
+        ticket = await _offload(service.generate_ticket, request.service_id, customer_data)
+        _invalidate_queue_state()
+        return _json_response(ticket.model_dump_json())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/tickets/{ticket_id}", response_model=Ticket, tags=["Tickets"])
+@router.get(
+    "/tickets/{ticket_id}",
+    response_model=None,
+    responses={200: {"model": Ticket}},
+    tags=["Tickets"],
+)
 async def get_ticket(
     ticket_id: UUID,
     service: QueueService = Depends(get_queue_service)
 ):
     """Get ticket by ID."""
-    result = service._get_ticket_by_id(ticket_id)
+    result = await _offload(service._get_ticket_by_id, ticket_id)
     if not result:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return result
+    return _json_response(result.model_dump_json())
 
 @router.post("/tickets/{ticket_id}/start", response_model=Ticket, tags=["Tickets"])
 async def start_service(
@@ -180,7 +255,9 @@ async def start_service(
 ):
     """Start servicing a ticket."""
     try:
-        return service.start_service(ticket_id)
+        result = await _offload(service.start_service, ticket_id)
+        _invalidate_queue_state()
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -192,7 +269,9 @@ async def complete_service(
 ):
     """Complete ticket service."""
     try:
-        return service.complete_service(ticket_id, request.satisfaction_score)
+        result = await _offload(service.complete_service, ticket_id, request.satisfaction_score)
+        _invalidate_queue_state()
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -204,7 +283,9 @@ async def cancel_ticket(
 ):
     """Cancel a ticket."""
     try:
-        return service.cancel_ticket(ticket_id, request.reason)
+        result = await _offload(service.cancel_ticket, ticket_id, request.reason)
+        _invalidate_queue_state()
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -212,18 +293,31 @@ async def cancel_ticket(
 # QUEUE MANAGEMENT ENDPOINTS
 # =============================================================================
 
-@router.get("/queue/state", response_model=QueueState, tags=["Queue"])
+@router.get(
+    "/queue/state",
+    response_model=None,
+    responses={200: {"model": QueueState}},
+    tags=["Queue"],
+)
 async def get_queue_state(
     service_id: Optional[UUID] = Query(None, description="Filter by service ID"),
     service: QueueService = Depends(get_queue_service)
 ):
     """Get current queue state."""
     try:
-        return service.get_queue_state(service_id)
+        return await _cached_state(
+            ("state", service_id),
+            lambda: service.get_queue_state(service_id).model_dump_json(),
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/queue/waiting", response_model=List[Ticket], tags=["Queue"])
+@router.get(
+    "/queue/waiting",
+    response_model=None,
+    responses={200: {"model": List[Ticket]}},
+    tags=["Queue"],
+)
 async def get_waiting_list(
     service_id: Optional[UUID] = Query(None, description="Filter by service ID"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of tickets"),
@@ -231,11 +325,19 @@ async def get_waiting_list(
 ):
     """Get current waiting list."""
     try:
-        return service.get_waiting_list(service_id, limit)
+        return await _cached_state(
+            ("waiting", service_id, limit),
+            lambda: orjson.dumps(service.get_waiting_list_raw(service_id, limit)),
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/counters/{counter_id}/call-next", response_model=Optional[Ticket], tags=["Queue"])
+@router.post(
+    "/counters/{counter_id}/call-next",
+    response_model=None,
+    responses={200: {"model": Optional[Ticket]}},
+    tags=["Queue"],
+)
 async def call_next_ticket(
     counter_id: UUID,
     request: CallNextTicketRequest,
@@ -243,7 +345,9 @@ async def call_next_ticket(
 ):
     """Call the next ticket for a counter."""
     try:
-        return service.call_next_ticket(counter_id, request.operator_name)
+        ticket = await _offload(service.call_next_ticket, counter_id, request.operator_name)
+        _invalidate_queue_state()
+        return _json_response(OptionalTicketAdapter.dump_json(ticket))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -286,7 +390,7 @@ async def queue_health_check(service: QueueService = Depends(get_queue_service))
         return {
             "status": "healthy",
             "database": "connected",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds")
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
\ No newline at end of file
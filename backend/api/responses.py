@@ -0,0 +1,20 @@
+"""
+Helios Core — Response Classes
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    
+    Serializes numpy arrays/scalars, UUIDs, datetimes and enums natively.
+    Return it directly from a route to bypass FastAPI's jsonable_encoder pass.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
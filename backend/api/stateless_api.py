@@ -3,22 +3,26 @@ Helios Core — Stateless API Routes
 For session-based, zero-DB deployments.
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Optional, List
-import pandas as pd
+from pydantic import BaseModel, PlainSerializer, PlainValidator, WithJsonSchema
+from typing import Annotated, Optional, List
+import asyncio
+import codecs
 import io
+import logging
 import os
 import shutil
 import hashlib
 import json
 import numpy as np
-import re
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
 from uuid import uuid4
 from pathlib import Path
 
+from backend.api.responses import ORJSONResponse
+from backend.config import MAX_UPLOAD_BYTES
 from backend.tools.generate_bundle import generate_supplementary_bundle
 
 from backend.tools.ingest_file import (
@@ -28,6 +32,7 @@ from backend.tools.ingest_file import (
     detect_column_mapping,
     detect_multi_pixel_columns,
     detect_time_column,
+    extract_area_from_header,
     _extract_unit
 )
 from backend.tools.solve_iv_curve import (
@@ -48,16 +53,142 @@ from backend.models.entities import (
     MeasurementType,
     SolverConfig,
     ExtractedParameters,
-    Analysis
+    Analysis,
+    utc_now
 )
 from backend.services.physics_service import extract_ideality_from_slope
 from backend.services.citation_service import generate_physics_audit_id, generate_bibtex
 
 router = APIRouter()
+log = logging.getLogger("helios.stateless")
+
+# Starlette has already spooled the whole multipart body by the time the
+# handler runs, so nothing here overlaps with the network. Reading the spool
+# in chunks only bounds the extra memory per read and lets the 413 fire as
+# soon as the limit is crossed.
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_UPLOAD_TOO_LARGE = f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit"
+
+
+async def _read_upload(file: UploadFile) -> tuple[bytes, str]:
+    """
+    Read an upload chunk by chunk, returning (content, sha256 hex digest).
+    
+    Aborts with 413 as soon as more than MAX_UPLOAD_BYTES have been read.
+    """
+    hasher = hashlib.sha256()
+    buf = io.BytesIO()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if buf.tell() + len(chunk) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=_UPLOAD_TOO_LARGE)
+        hasher.update(chunk)
+        buf.write(chunk)
+    # getvalue() hands over BytesIO's own buffer rather than copying it
+    return buf.getvalue(), hasher.hexdigest()
+
+
+# Byte-order marks settle the encoding without decoding the payload
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _sniff_encoding(content: bytes) -> str:
+    """BOM and pure-ASCII fast paths in front of _detect_encoding."""
+    for bom, encoding in _BOM_ENCODINGS:
+        if content.startswith(bom):
+            return encoding
+    # isascii() is a C scan with no allocation; ASCII is valid UTF-8
+    if content.isascii():
+        return "utf-8"
+    return _detect_encoding(content)
+
+
+# Request strings -> enum members, built once instead of Enum value lookups per call
+_ANALYSIS_MODES = {m.value: m for m in AnalysisMode}
+_MODEL_TYPES = {m.value: m for m in ModelType}
+_MEASUREMENT_TYPES = {m.value: m for m in MeasurementType}
+
+
+def _enum_field(table: dict, value: str, field: str):
+    """Enum member for a request string; 400 listing the accepted values otherwise."""
+    member = table.get(value)
+    if member is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {field} {value!r}; expected one of: {', '.join(table)}",
+        )
+    return member
+
+# Current unit markers (substring of the lowercased unit) and the divisor that
+# takes them to amperes. Order matters: "ma" is checked before "ua".
+_CURRENT_UNIT_DIVISORS = (("ma", 1000.0), ("ua", 1e6), ("µa", 1e6))
+
+
+def _writable_out(arr: np.ndarray) -> Optional[np.ndarray]:
+    """`arr` if a ufunc may write into it, else None so the ufunc allocates."""
+    return arr if arr.flags.writeable else None
+
+
+def _to_amps(I: np.ndarray, unit: str) -> np.ndarray:
+    """Convert a current column to A, in place when the buffer allows it."""
+    for marker, divisor in _CURRENT_UNIT_DIVISORS:
+        if marker in unit:
+            return np.divide(I, divisor, out=_writable_out(I))
+    return I
+
+
+def _as_float_array(value) -> np.ndarray:
+    """
+    Validate a JSON number array into float64 with one vectorized conversion.
+    
+    ValueError (a 422, not a 500) for anything but a flat array of finite
+    numbers; numpy would otherwise turn null into NaN.
+    """
+    if not isinstance(value, (list, tuple, np.ndarray)):
+        raise ValueError("expected a 1-D array of numbers")
+    try:
+        arr = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("expected a 1-D array of numbers") from None
+    if arr.ndim != 1:
+        raise ValueError("expected a 1-D array of numbers")
+    if not np.isfinite(arr).all():
+        raise ValueError("array contains null or non-finite values")
+    return arr
+
+
+# IV samples arrive as JSON number lists; validating them element by element
+# dominates request parsing for long sweeps.
+NPFloatArray = Annotated[
+    np.ndarray,
+    PlainValidator(_as_float_array),
+    PlainSerializer(lambda arr: arr.tolist(), return_type=List[float]),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
+
+def _parse_upload(content: bytes, filename: str):
+    """Decode, sniff and parse an upload. Blocking; run off the event loop."""
+    encoding = _sniff_encoding(content)
+    
+    try:
+        content_str = content.decode(encoding)
+    except UnicodeDecodeError:
+        content_str = content.decode("latin-1")
+        encoding = "latin-1"
+
+    hardware_profile, low_confidence = detect_hardware_profile(content_str, filename)
+    df = _parse_to_dataframe(content, filename, encoding)
+    return encoding, content_str, hardware_profile, low_confidence, df
+
 
 class StatelessExportRequest(BaseModel):
-    voltage: List[float]
-    current: List[float]
+    voltage: NPFloatArray
+    current: NPFloatArray
     device_label: str
     mode: str
     model_type: str = "OneDiode"
@@ -66,40 +197,6 @@ class StatelessExportRequest(BaseModel):
     results: dict  # derived parameters
     result_hash: str
 
-def extract_area_from_header(content_str: str) -> Optional[float]:
-    """
-    Attempt to extract device area from file header content.
-    """
-    try:
-        # Look for common area patterns in the first 4000 chars
-        area_patterns = [
-            r"device\s*area\s*[:=\t,]\s*([\d\.]+)",
-            r"area\s*\(?cm2\)?\s*[:=\t,]\s*([\d\.]+)",
-            r"area\s*\(?cm\^2\)?\s*[:=\t,]\s*([\d\.]+)",
-        ]
-        for pattern in area_patterns:
-            match = re.search(pattern, content_str[:4000], re.IGNORECASE)
-            if match:
-                return float(match.group(1))
-        
-        # Special case for tabular metadata
-        lines = content_str.split('\n')
-        if len(lines) > 2:
-            for i in range(min(5, len(lines))):
-                headers = [h.strip().lower() for h in re.split(r'[\t,]', lines[i])]
-                if "device area" in headers:
-                    idx = headers.index("device area")
-                    if i + 1 < len(lines):
-                        values = re.split(r'[\t,]', lines[i+1])
-                        if len(values) > idx:
-                            try:
-                                return float(values[idx].strip())
-                            except ValueError:
-                                pass
-    except Exception as e:
-        print(f"[Stateless] Warning: Failed to extract area locally: {e}")
-    return None
-
 class StatelessProcessResponse(BaseModel):
     filename: str
     file_hash: str
@@ -110,8 +207,8 @@ class StatelessProcessResponse(BaseModel):
     detected_area: Optional[float] = None
 
 class StatelessAnalyzeRequest(BaseModel):
-    voltage: List[float]
-    current: List[float]
+    voltage: NPFloatArray
+    current: NPFloatArray
     device_label: str
     mode: str = "Exploration"
     model_type: str = "OneDiode"
@@ -119,25 +216,32 @@ class StatelessAnalyzeRequest(BaseModel):
     temperature_k: float = 298.15
     measurement_type: str = "light"
 
-@router.post("/process", response_model=StatelessProcessResponse)
-async def process_file_stateless(file: UploadFile = File(...)):
+@router.post(
+    "/process",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": StatelessProcessResponse}},
+)
+async def process_file_stateless(request: Request, file: UploadFile = File(...)):
     """
     Process an uploaded file and return all data immediately.
     No database or disk storage used.
     """
+    # Reject on the declared size before hashing or parsing anything
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=_UPLOAD_TOO_LARGE)
+    
     try:
-        content = await file.read()
-        file_hash = hashlib.sha256(content).hexdigest()
-        encoding = _detect_encoding(content)
+        content, file_hash = await _read_upload(file)
+        loop = asyncio.get_running_loop()
+        encoding, content_str, hardware_profile, low_confidence, df = await loop.run_in_executor(
+            None, _parse_upload, content, file.filename
+        )
         
-        try:
-            content_str = content.decode(encoding)
-        except UnicodeDecodeError:
-            content_str = content.decode("latin-1")
-            encoding = "latin-1"
-
-        hardware_profile, low_confidence = detect_hardware_profile(content_str, file.filename)
-        df = _parse_to_dataframe(content, file.filename, encoding)
+        # An IV curve needs at least two columns and two samples; skip detection otherwise
+        if len(df) < 2 or df.shape[1] < 2:
+            raise HTTPException(status_code=400, detail="Processing failed: insufficient data for an IV curve")
         
         # Detect columns
         multi_pixels = detect_multi_pixel_columns(df)
@@ -147,20 +251,16 @@ async def process_file_stateless(file: UploadFile = File(...)):
         
         if multi_pixels:
             for i, (v_col, i_col) in enumerate(multi_pixels):
-                V = df[v_col].astype(float).values
-                I = df[i_col].astype(float).values
+                V = df[v_col].to_numpy(dtype=np.float64, copy=False)
+                I = df[i_col].to_numpy(dtype=np.float64, copy=False)
                 
                 # Unit conversion to standard A
-                i_unit = _extract_unit(i_col, "A").lower()
-                if "ma" in i_unit:
-                    I = I / 1000.0
-                elif "ua" in i_unit or "µa" in i_unit:
-                    I = I / 1e6
+                I = _to_amps(I, _extract_unit(i_col, "A").lower())
                 
                 measurements_data.append({
                     "device_label": f"{file.filename}_Pixel_{i+1}",
-                    "voltage": V.tolist(),
-                    "current": I.tolist(),
+                    "voltage": V,
+                    "current": I,
                     "v_column": v_col,
                     "i_column": i_col
                 })
@@ -170,55 +270,57 @@ async def process_file_stateless(file: UploadFile = File(...)):
             area_to_use = detected_area if detected_area is not None else 1.0
 
             cmap = detect_column_mapping(df)
-            V = df[cmap.voltage_column].astype(float).values
-            I = df[cmap.current_column].astype(float).values
+            V = df[cmap.voltage_column].to_numpy(dtype=np.float64, copy=False)
+            I = df[cmap.current_column].to_numpy(dtype=np.float64, copy=False)
             
             # Unit conversion to standard A
             i_unit = cmap.current_unit.lower()
             is_density = "/cm" in i_unit or "cm^2" in i_unit
 
-            if "ma" in i_unit:
-                I = I / 1000.0
-            elif "ua" in i_unit or "µa" in i_unit:
-                I = I / 1e6
+            I = _to_amps(I, i_unit)
             
             # Density handling
             if is_density:
-                I = I * area_to_use
+                I = np.multiply(I, area_to_use, out=_writable_out(I))
                 
             measurements_data.append({
                 "device_label": file.filename.split('.')[0],
-                "voltage": V.tolist(),
-                "current": I.tolist(),
+                "voltage": V,
+                "current": I,
                 "v_column": cmap.voltage_column,
                 "i_column": cmap.current_column
             })
 
-        return StatelessProcessResponse(
-            filename=file.filename,
-            file_hash=file_hash,
-            hardware_profile=hardware_profile.value,
-            encoding=encoding,
-            low_confidence=low_confidence,
-            measurements=measurements_data,
-            detected_area=detected_area
-        )
+        # Arrays go to orjson as-is; it writes the float64 buffers directly
+        return ORJSONResponse({
+            "filename": file.filename,
+            "file_hash": file_hash,
+            "hardware_profile": hardware_profile.value,
+            "encoding": encoding,
+            "low_confidence": low_confidence,
+            "measurements": measurements_data,
+            "detected_area": detected_area,
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        print(f"[Stateless] Error: {e}")
-        print(traceback.format_exc())
+        log.exception("Stateless processing failed: %s", file.filename)
         raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
 
-@router.post("/analyze")
+@router.post("/analyze", response_class=ORJSONResponse)
 async def analyze_stateless(request: StatelessAnalyzeRequest):
     """
     Analyze IV data and return results with full diagnostics.
     No database records created.
     """
+    mode = _enum_field(_ANALYSIS_MODES, request.mode, "mode")
+    model_type = _enum_field(_MODEL_TYPES, request.model_type, "model_type")
+    measurement_type = _enum_field(_MEASUREMENT_TYPES, request.measurement_type, "measurement_type")
+    
     try:
-        V = np.array(request.voltage, dtype=np.float64)
-        I_measured = np.array(request.current, dtype=np.float64)
+        V = np.asarray(request.voltage, dtype=np.float64)
+        I_measured = np.asarray(request.current, dtype=np.float64)
         
         
         # Measurement needs an ID, we'll use a random one as it's not persisted
@@ -230,17 +332,22 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
             metadata=MeasurementMetadata(
                 cell_area_cm2=request.area_cm2,
                 temperature_c=request.temperature_k - 273.15,
-                measurement_type=MeasurementType(request.measurement_type)
+                measurement_type=measurement_type
             )
         )
         
-        # Run physics engine
-        analysis = analyze_measurement(
-            measurement=measurement,
-            V=V,
-            I=I_measured,
-            mode=AnalysisMode(request.mode),
-            model_type=ModelType(request.model_type),
+        # Run physics engine off the event loop
+        loop = asyncio.get_running_loop()
+        analysis = await loop.run_in_executor(
+            None,
+            partial(
+                analyze_measurement,
+                measurement=measurement,
+                V=V,
+                I=I_measured,
+                mode=mode,
+                model_type=model_type,
+            ),
         )
         
         # Generate Diagnostics
@@ -249,6 +356,10 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
         if analysis.status == AnalysisStatus.VALID and analysis.parameters:
             p = analysis.parameters
             try:
+                # Area-normalized resistances, shared by both model branches
+                R_s = p.r_s / request.area_cm2
+                R_sh = p.r_sh / request.area_cm2
+                
                 # Reconstruct fitted curve for residuals based on model type
                 if analysis.solver_config.model_type == ModelType.TWO_DIODE:
                     I_fitted = two_diode_equation(
@@ -258,8 +369,8 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
                         n1=p.n_ideality or 1.0,
                         I_02=getattr(p, 'i_02', 1e-12),
                         n2=getattr(p, 'n2_ideality', 2.0),
-                        R_s=p.r_s / request.area_cm2,
-                        R_sh=p.r_sh / request.area_cm2,
+                        R_s=R_s,
+                        R_sh=R_sh,
                         T_k=request.temperature_k
                     )
                 else:
@@ -268,8 +379,8 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
                         I_ph=p.i_ph or 0.0,
                         I_0=p.i_0 or 1e-12,
                         n=p.n_ideality or 1.0,
-                        R_s=p.r_s / request.area_cm2,
-                        R_sh=p.r_sh / request.area_cm2,
+                        R_s=R_s,
+                        R_sh=R_sh,
                         T_k=request.temperature_k
                     )
                 
@@ -289,23 +400,20 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
                 report.analyze_boundary_stress(diag_params, bounds)
                 diagnostic_report = report.generate_report()
             except Exception as e:
-                print(f"Diagnostic generation failed: {e}")
+                log.warning("Diagnostic generation failed: %s", e)
                 # We still want to return the results even if diagnostics fail
 
         # Prepare response
+        audit_id = generate_physics_audit_id(analysis.solver_config)
         res = {
             "status": analysis.status.value,
             "mode": analysis.mode.value,
             "result_hash": analysis.result_hash,
             "error_message": analysis.error_message,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
             "diagnostics": diagnostic_report,
-            "audit_id": generate_physics_audit_id(analysis.solver_config),
-            "bibtex": generate_bibtex(
-                generate_physics_audit_id(analysis.solver_config), 
-                analysis.mode, 
-                str(analysis.id)
-            )
+            "audit_id": audit_id,
+            "bibtex": generate_bibtex(audit_id, analysis.mode, str(analysis.id))
         }
         
         if analysis.parameters:
@@ -323,21 +431,22 @@ async def analyze_stateless(request: StatelessAnalyzeRequest):
                 "n_slope": extract_ideality_from_slope(
                     V, I_measured, 
                     temp_c=request.temperature_k - 273.15,
-                    is_light=request.measurement_type == "light",
+                    is_light=measurement_type == MeasurementType.LIGHT,
                     j_sc=analysis.parameters.j_sc
                 ),
                 "n_dark": analysis.parameters.n_dark,
                 "i_0_dark": analysis.parameters.i_0_dark,
                 "r_s_dark": analysis.parameters.r_s_dark,
                 "r_sh_dark": analysis.parameters.r_sh_dark,
-                "fit_current": I_fitted.tolist() if I_fitted is not None else None
+                # Display-only curve: float32 keeps ~7 significant digits, ample
+                # for plotting, and orjson writes it in about half the bytes
+                "fit_current": I_fitted.astype(np.float32) if I_fitted is not None else None
             })
             
-        return res
+        return ORJSONResponse(res)
 
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        log.exception("Stateless analysis failed")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -347,6 +456,9 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
     Generate a full export bundle (PDF/SVG/LaTeX) from stateless session data.
     Creates a temporary raw file to satisfy the bundle generator's contract.
     """
+    mode = _enum_field(_ANALYSIS_MODES, request.mode, "mode")
+    model_type = _enum_field(_MODEL_TYPES, request.model_type, "model_type")
+    
     try:
         # 1. Create Transient Entities
         meas_id = uuid4()
@@ -357,9 +469,15 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
         temp_dir.mkdir(exist_ok=True)
         raw_path = temp_dir / f"{request.device_label}_{meas_id}.csv"
         
-        # Reconstruct CSV content
-        df = pd.DataFrame({"V": request.voltage, "I": request.current})
-        df.to_csv(raw_path, index=False)
+        # Reconstruct CSV content; %.17g round-trips every float64 exactly
+        np.savetxt(
+            raw_path,
+            np.column_stack((request.voltage, request.current)),
+            fmt="%.17g",
+            delimiter=",",
+            header="V,I",
+            comments="",
+        )
         
         # Cleanup task
         def cleanup_files():
@@ -389,7 +507,7 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
         )
         
         solver_config = SolverConfig(
-            model_type=ModelType(request.model_type),
+            model_type=model_type,
             solver_seed=42  # Standard lock
         )
         
@@ -415,8 +533,8 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
         analysis = Analysis(
             id=ana_id,
             measurement_id=meas_id,
-            timestamp=datetime.utcnow(),
-            mode=AnalysisMode(request.mode),
+            timestamp=utc_now(),
+            mode=mode,
             status=AnalysisStatus.VALID,
             solver_config=solver_config,
             parameters=params,
@@ -424,7 +542,10 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
         )
 
         # 2. Generate Bundle
-        bundle_path = generate_supplementary_bundle(analysis, measurement)
+        loop = asyncio.get_running_loop()
+        bundle_path = await loop.run_in_executor(
+            None, generate_supplementary_bundle, analysis, measurement
+        )
         
         # Add bundle path to cleanup
         def cleanup_bundle():
@@ -440,6 +561,5 @@ async def download_bundle_stateless(request: StatelessExportRequest, background_
         )
         
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        log.exception("Stateless export failed")
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
@@ -11,18 +11,21 @@ Failure to enforce this invalidates all determinism guarantees.
 import os
 import sys
 import warnings
+from types import MappingProxyType
 
 # =============================================================================
 # DETERMINISM CONTRACT — NON-NEGOTIABLE
 # =============================================================================
 
-DETERMINISM_ENV_VARS = {
+# Read-only views: these tables are shared by every request, and an in-place
+# edit would silently change the results of later solves.
+DETERMINISM_ENV_VARS = MappingProxyType({
     "OMP_NUM_THREADS": "1",
     "MKL_NUM_THREADS": "1",
     "OPENBLAS_NUM_THREADS": "1",
     "NUMEXPR_NUM_THREADS": "1",
     "VECLIB_MAXIMUM_THREADS": "1",
-}
+})
 
 GLOBAL_RNG_SEED = 42
 
@@ -66,7 +69,7 @@ def get_rng_seed() -> int:
 # SOLVER CONFIGURATION — LOCKED PARAMETERS
 # =============================================================================
 
-DIFFERENTIAL_EVOLUTION_CONFIG = {
+DIFFERENTIAL_EVOLUTION_CONFIG = MappingProxyType({
     "strategy": "best1bin",
     "mutation": (0.5, 1.0),
     "recombination": 0.7,
@@ -75,35 +78,35 @@ DIFFERENTIAL_EVOLUTION_CONFIG = {
     "updating": "deferred",
     "workers": 1,
     "polish": False,  # We do our own L-M refinement
-}
+})
 
 # High-speed variant for Exploration mode
-EXPLORATION_DE_CONFIG = {
+EXPLORATION_DE_CONFIG = MappingProxyType({
     **DIFFERENTIAL_EVOLUTION_CONFIG,
     "popsize": 5,      # Smaller population for speed
     "maxiter": 100,    # Cap iterations
     "tol": 0.05,       # Relax tolerance
-}
+})
 
-LEVENBERG_MARQUARDT_CONFIG = {
+LEVENBERG_MARQUARDT_CONFIG = MappingProxyType({
     "method": "lm",
     "xtol": 1e-10,
     "ftol": 1e-10,
     "gtol": 1e-10,
     "max_nfev": 10000,
-}
+})
 
 
 # =============================================================================
 # NUMERICAL TOLERANCES — CROSS-PLATFORM
 # =============================================================================
 
-NUMERICAL_TOLERANCES = {
+NUMERICAL_TOLERANCES = MappingProxyType({
     "Jsc": 0.001,   # ±0.1%
     "Voc": 0.0005,  # ±0.05%
     "FF": 0.001,    # ±0.1%
     "PCE": 0.0015,  # ±0.15%
-}
+})
 
 
 # =============================================================================
@@ -133,6 +136,102 @@ def ensure_directories() -> None:
             print(f"[Helios Core] Warning: Could not create directories: {e}")
 
 
+# =============================================================================
+# UPLOAD LIMITS
+# =============================================================================
+
+# Largest upload the stateless /process route will hash and parse (bytes)
+MAX_UPLOAD_BYTES = int(os.environ.get("HELIOS_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+
+
+# =============================================================================
+# SOLVER POOL
+# =============================================================================
+
+# Every web worker (WEB_CONCURRENCY of them) owns a solver process pool, so
+# the default splits the machine's cores between them instead of giving each
+# worker all of them. HELIOS_SOLVER_WORKERS sets the per-worker size directly.
+SOLVER_WORKERS = int(os.environ.get("HELIOS_SOLVER_WORKERS", 0)) or max(
+    1, (os.cpu_count() or 1) // int(os.environ.get("WEB_CONCURRENCY", 1))
+)
+
+
+# =============================================================================
+# API DOCS
+# =============================================================================
+
+# Set HELIOS_API_DOCS=0 in production to drop /openapi.json, /docs and /redoc
+API_DOCS_ENABLED = os.environ.get("HELIOS_API_DOCS", "1") != "0"
+
+
+# =============================================================================
+# LOGGING
+# =============================================================================
+
+LOG_LEVEL = os.environ.get("HELIOS_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "[%(name)s] %(levelname)s: %(message)s"
+
+_log_listener = None
+
+
+def configure_logging() -> None:
+    """
+    Route "helios.*" loggers through a queue drained by a listener thread.
+    
+    Disabled levels cost a single check; enabled records are only enqueued by
+    the request path and written to the stream from the listener thread.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    import atexit
+    import logging
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("helios")
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.propagate = False
+    
+    _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    # Threads do not survive fork. A worker forked from a preloaded app
+    # (gunicorn --preload) inherits a copy of the in-process queue and handler
+    # but no thread draining it, so it starts its own listener.
+    global _log_listener_pid
+    _log_listener_pid = os.getpid()
+    os.register_at_fork(after_in_child=_restart_log_listener)
+
+
+_log_listener_pid = None
+
+
+def _restart_log_listener() -> None:
+    """Start a fresh listener for the inherited log queue in a forked child."""
+    global _log_listener
+    from logging.handlers import QueueListener
+    
+    # Only direct children of the configuring process (web workers); processes
+    # those workers fork in turn are left alone
+    if os.getppid() != _log_listener_pid:
+        return
+    
+    _log_listener = QueueListener(
+        _log_listener.queue,
+        *_log_listener.handlers,
+        respect_handler_level=_log_listener.respect_handler_level,
+    )
+    _log_listener.start()
+
+
 # =============================================================================
 # STARTUP HOOK
 # =============================================================================
@@ -144,6 +243,7 @@ def initialize() -> None:
     Call this at application startup before any imports of numerical libraries.
     """
     enforce_determinism()
+    configure_logging()
     
     # Only try to ensure directories if we're not running in a strictly stateless/serverless mode
     # Or at least handle the failure gracefully
@@ -5,28 +5,30 @@ CRITICAL: Determinism lock is enforced at import time.
 """
 
 # Enforce determinism BEFORE any numerical imports
-from backend.config import initialize
+from backend.config import API_DOCS_ENABLED, initialize
 initialize()
 
 # Now safe to import numerical libraries and FastAPI
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 
 app = FastAPI(
     title="Helios Core",
     version="1.0.0",
     description="Deterministic IV Characterization Platform",
+    # Disabled docs also take their routes out of the per-request match list
+    openapi_url="/openapi.json" if API_DOCS_ENABLED else None,
+    docs_url="/docs" if API_DOCS_ENABLED else None,
+    redoc_url="/redoc" if API_DOCS_ENABLED else None,
 )
 
-# CORS for local and production
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Adjusted for Vercel routing
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS for local and production: allow-all (adjusted for Vercel routing)
+from backend.middleware import PermissiveCORSMiddleware
+app.add_middleware(PermissiveCORSMiddleware)
+
+
+# Probes hit this constantly; the body never changes, so it is serialized once
+_HEALTH_BODY = b'{"status":"ok","determinism":"locked"}'
 
 
 @app.get("/health")
@@ -35,31 +37,45 @@ async def health_check(request: Request):
     """Health check endpoint supporting both GET and HEAD."""
     if request.method == "HEAD":
         return Response(status_code=200)
-    return {"status": "ok", "determinism": "locked"}
+    return Response(_HEALTH_BODY, media_type="application/json")
     
 
-@app.get("/verify/{audit_id}")
+# Everything in the verification seal except the audit ID is fixed per process
+import orjson
+from cachetools import LRUCache
+from backend.api.responses import ORJSONResponse
+from backend.config import FRONTEND_BASE_URL
+from backend.services.citation_service import generate_runtime_signature
+
+_VERIFY_STATIC = {
+    "kernel": "Helios Core Deterministic Fit Engine",
+    "runtime_signature": generate_runtime_signature(),
+    "verification_statement": (
+        "This Audit ID corresponds to an analysis performed using the Helios Core "
+        "physics engine. This kernel is strictly deterministic: given the same "
+        "input data and solver configuration, it will always produce this exact fingerprint."
+    ),
+    "docs": f"{FRONTEND_BASE_URL}/documentation/reproducibility"
+}
+
+# A seal never changes for a given audit ID; keep recently verified ones encoded
+VERIFY_CACHE_SIZE = 1024
+_verify_cache: LRUCache = LRUCache(maxsize=VERIFY_CACHE_SIZE)
+
+
+@app.get("/verify/{audit_id}", response_class=ORJSONResponse)
 async def verify_analysis(audit_id: str):
     """
     Public Verification Seal.
     Confirms that an analysis with this Physics Kernel ID is theoretically valid
     under the Helios Core Deterministic Engine.
     """
-    from backend.services.citation_service import generate_runtime_signature
-    from backend.config import FRONTEND_BASE_URL
-    
-    return {
-        "status": "VALIDATED",
-        "audit_id": audit_id,
-        "kernel": "Helios Core Deterministic Fit Engine",
-        "runtime_signature": generate_runtime_signature(),
-        "verification_statement": (
-            "This Audit ID corresponds to an analysis performed using the Helios Core "
-            "physics engine. This kernel is strictly deterministic: given the same "
-            "input data and solver configuration, it will always produce this exact fingerprint."
-        ),
-        "docs": f"{FRONTEND_BASE_URL}/documentation/reproducibility"
-    }
+    body = _verify_cache.get(audit_id)
+    if body is None:
+        body = _verify_cache[audit_id] = orjson.dumps(
+            {"status": "VALIDATED", "audit_id": audit_id, **_VERIFY_STATIC}
+        )
+    return Response(body, media_type="application/json")
 
 
 # Route registration
@@ -78,4 +94,14 @@ port = int(os.environ.get("PORT", 8000))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # "auto" picks uvloop/httptools when uvicorn[standard] is installed and
+    # falls back to asyncio/h11 where they are unavailable (e.g. Windows).
+    # Workers need the import string rather than the app object.
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="auto",
+        http="auto",
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+    )
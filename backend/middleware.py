@@ -0,0 +1,87 @@
+"""
+Helios Core — ASGI Middleware
+
+Plain ASGI callables; no per-request Request/Headers objects are built.
+"""
+
+# Request header names as ASGI delivers them (lowercased bytes)
+_ORIGIN = b"origin"
+_REQUEST_METHOD = b"access-control-request-method"
+_REQUEST_HEADERS = b"access-control-request-headers"
+
+# Preflight responses vary on every request header that shapes them
+_PREFLIGHT_VARY = b"Origin, Access-Control-Request-Method, Access-Control-Request-Headers"
+_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+
+class PermissiveCORSMiddleware:
+    """
+    Allow-all CORS policy.
+
+    Same behaviour as CORSMiddleware(allow_origins=["*"], allow_credentials=True,
+    allow_methods=["*"], allow_headers=["*"]): the request Origin is echoed back
+    (browsers reject "*" on credentialed requests) and preflights are answered
+    here without reaching the application.
+    """
+
+    def __init__(self, app, max_age: int = 600):
+        self.app = app
+        self.max_age = str(max_age).encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = requested_method = requested_headers = None
+        if scope["method"] == "OPTIONS":
+            for name, value in scope["headers"]:
+                if name == _ORIGIN:
+                    origin = value
+                elif name == _REQUEST_METHOD:
+                    requested_method = value
+                elif name == _REQUEST_HEADERS:
+                    requested_headers = value
+            
+            if origin is not None and requested_method is not None:
+                await self._preflight(send, origin, requested_headers)
+                return
+        else:
+            # Everything but a preflight only needs the Origin header
+            for name, value in scope["headers"]:
+                if name == _ORIGIN:
+                    origin = value
+                    break
+        
+        if origin is None:
+            # Not a CORS request: nothing to add, so skip the send wrapper
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"access-control-allow-origin", origin))
+                headers.append((b"access-control-allow-credentials", b"true"))
+                headers.append((b"vary", b"Origin"))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, send, origin: bytes, requested_headers) -> None:
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", b"2"),
+            (b"vary", _PREFLIGHT_VARY),
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-methods", _ALLOW_METHODS),
+            (b"access-control-max-age", self.max_age),
+            (b"access-control-allow-credentials", b"true"),
+        ]
+        if requested_headers is not None:
+            # Allow-all headers: mirror whatever the browser asked for
+            headers.append((b"access-control-allow-headers", requested_headers))
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
@@ -5,7 +5,7 @@ Pydantic schemas for ImportRecord, Measurement, and Analysis.
 Per SOP_PERSISTENCE: All entities are immutable after creation in Reference Mode.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
@@ -13,6 +13,18 @@ from uuid import UUID, uuid4
 from pydantic import BaseModel, Field, ConfigDict
 
 
+# =============================================================================
+# CLOCK
+# =============================================================================
+
+# Timestamps are naive UTC throughout: stored rows are parsed back with
+# fromisoformat() and compared against fresh timestamps, so mixing in
+# tz-aware values would break those comparisons.
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime (datetime.utcnow() is deprecated in 3.12)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # =============================================================================
 # ENUMS
 # =============================================================================
@@ -79,7 +91,7 @@ class ImportRecord(BaseModel):
     id: UUID = Field(default_factory=uuid4)
     source_filename: str
     file_hash: str  # SHA-256
-    ingestion_timestamp: datetime = Field(default_factory=datetime.utcnow)
+    ingestion_timestamp: datetime = Field(default_factory=utc_now)
     hardware_profile: HardwareProfile
     column_map: ColumnMap
     encoding_detected: str = "utf-8"
@@ -163,7 +175,7 @@ class Analysis(BaseModel):
     
     id: UUID = Field(default_factory=uuid4)
     measurement_id: UUID
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     mode: AnalysisMode
     status: AnalysisStatus = AnalysisStatus.PENDING
     solver_config: SolverConfig
@@ -171,6 +183,9 @@ class Analysis(BaseModel):
     result_hash: Optional[str] = None  # SHA-256 of results for determinism check
     masks_applied: list[dict] = Field(default_factory=list)
     error_message: Optional[str] = None
+    # Fitted model current on the measured voltage grid (raw float64 bytes),
+    # stored at fit time so diagnostics do not re-evaluate the diode equation
+    fitted_current: Optional[bytes] = Field(default=None, repr=False)
 
 
 # =============================================================================
@@ -214,6 +229,7 @@ CREATE TABLE IF NOT EXISTS analyses (
     result_hash TEXT,
     masks_applied TEXT NOT NULL,
     error_message TEXT,
+    fitted_current BLOB,
     FOREIGN KEY (measurement_id) REFERENCES measurements(id)
 );
 """
@@ -5,12 +5,75 @@ Pydantic schemas for Queue, Ticket, Counter, and Service entities.
 Follows existing Helios Core patterns with proper immutability and deterministic design.
 """
 
+import json
+import os
+import sqlite3
+import threading
+import time
 from datetime import datetime
 from enum import Enum
 from typing import Optional, List
-from uuid import UUID, uuid4
+from uuid import UUID
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+
+from backend.models.entities import utc_now
+
+
+# =============================================================================
+# IDENTIFIERS
+# =============================================================================
+
+# Random bytes drawn from the OS per refill; one UUID7 consumes 10
+UUID7_RANDOM_POOL_BYTES = 4096
+
+_uuid7_lock = threading.Lock()
+_uuid7_pool = b""
+_uuid7_pos = 0
+
+
+def uuid7() -> UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7).
+    
+    Queue tables are clustered on their TEXT primary key (WITHOUT ROWID), so
+    ids that sort by creation time turn inserts into appends at the right
+    edge of the B-tree. Randomness comes from a pooled os.urandom buffer
+    instead of one urandom call per id.
+    """
+    global _uuid7_pool, _uuid7_pos
+    with _uuid7_lock:
+        if _uuid7_pos + 10 > len(_uuid7_pool):
+            _uuid7_pool = os.urandom(UUID7_RANDOM_POOL_BYTES)
+            _uuid7_pos = 0
+        rand = int.from_bytes(_uuid7_pool[_uuid7_pos:_uuid7_pos + 10], "big")
+        _uuid7_pos += 10
+    
+    unix_ms = time.time_ns() // 1_000_000
+    return UUID(int=(
+        (unix_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                           # version
+        | (rand >> 68) << 64                  # rand_a, 12 bits
+        | 0b10 << 62                          # RFC 4122 variant
+        | rand & 0x3FFF_FFFF_FFFF_FFFF        # rand_b, 62 bits
+    ))
+
+
+def pack_uuids(ids: List[UUID]) -> bytes:
+    """Concatenate UUIDs as raw 16-byte chunks for a BLOB column."""
+    return b"".join(u.bytes for u in ids)
+
+
+def unpack_uuids(value) -> List[UUID]:
+    """
+    Inverse of pack_uuids.
+    
+    Rows written before UUID lists were packed hold a JSON array of strings;
+    those are still accepted.
+    """
+    if isinstance(value, str):
+        return [UUID(s) for s in json.loads(value)]
+    return [UUID(bytes=value[i:i + 16]) for i in range(0, len(value), 16)]
 
 
 # =============================================================================
@@ -59,7 +122,7 @@ class Service(BaseModel):
     """
     model_config = ConfigDict(frozen=True)
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     name: str
     service_type: ServiceType
     description: str
@@ -67,7 +130,7 @@ class Service(BaseModel):
     estimated_duration_minutes: int = 5
     priority_default: Priority = Priority.NORMAL
     is_active: bool = True
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
 
 
 # =============================================================================
@@ -81,7 +144,7 @@ class Counter(BaseModel):
     """
     model_config = ConfigDict(frozen=True)
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     name: str
     number: str  # Display number (e.g., "1", "2", "A")
     location: str
@@ -102,7 +165,7 @@ class Ticket(BaseModel):
     """
     model_config = ConfigDict(frozen=True)
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     ticket_number: str  # e.g., "A001", "B045"
     service_id: UUID
     customer_name: Optional[str] = None
@@ -112,7 +175,7 @@ class Ticket(BaseModel):
     priority: Priority = Priority.NORMAL
     
     # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     called_at: Optional[datetime] = None
     service_started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -137,7 +200,7 @@ class Queue(BaseModel):
     """
     model_config = ConfigDict(frozen=True)
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     name: str
     service_ids: List[UUID]  # Services included in this queue
     description: str
@@ -152,7 +215,7 @@ class Queue(BaseModel):
     currently_waiting: int = 0
     total_served_today: int = 0
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
 
 
 # =============================================================================
@@ -165,7 +228,7 @@ class QueueState(BaseModel):
     Used for WebSocket updates and dashboard displays.
     """
     queue_id: UUID
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     waiting_tickets: List[Ticket]
     currently_serving: List[Ticket]
     average_wait_time_minutes: float
@@ -179,7 +242,7 @@ class CounterState(BaseModel):
     Current ticket being served and counter status.
     """
     counter_id: UUID
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     status: CounterStatus
     current_ticket: Optional[Ticket] = None
     next_ticket_number: Optional[str] = None
@@ -187,6 +250,12 @@ class CounterState(BaseModel):
     service_time_minutes: Optional[float] = None
 
 
+# Serializers for response payloads that are not a single model, built once
+# instead of per request
+TicketListAdapter = TypeAdapter(List[Ticket])
+OptionalTicketAdapter = TypeAdapter(Optional[Ticket])
+
+
 # =============================================================================
 # ANALYTICS MODELS
 # =============================================================================
@@ -238,7 +307,11 @@ class ServiceMetrics(BaseModel):
 # DATABASE TABLE SCHEMAS (for SQLite)
 # =============================================================================
 
-SERVICES_TABLE = """
+# Every queue table is keyed by a UUID string, so a rowid table only adds a
+# second B-tree lookup per row. STRICT column typing needs SQLite 3.37+.
+TABLE_OPTIONS = "WITHOUT ROWID, STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else "WITHOUT ROWID"
+
+SERVICES_TABLE = f"""
 CREATE TABLE IF NOT EXISTS services (
     id TEXT PRIMARY KEY,
     name TEXT NOT NULL,
@@ -249,24 +322,31 @@ CREATE TABLE IF NOT EXISTS services (
     priority_default TEXT NOT NULL DEFAULT 'normal',
     is_active INTEGER NOT NULL DEFAULT 1,
     created_at TEXT NOT NULL
-);
+) {TABLE_OPTIONS};
 """
 
-COUNTERS_TABLE = """
+COUNTERS_TABLE = f"""
 CREATE TABLE IF NOT EXISTS counters (
     id TEXT PRIMARY KEY,
     name TEXT NOT NULL,
     number TEXT NOT NULL UNIQUE,
     location TEXT NOT NULL,
     status TEXT NOT NULL DEFAULT 'inactive',
-    services_offered TEXT NOT NULL DEFAULT '[]',
+    services_offered BLOB NOT NULL DEFAULT x'',  -- packed 16-byte UUIDs
     current_operator TEXT,
     opened_at TEXT,
     UNIQUE(name, number)
-);
+) {TABLE_OPTIONS};
 """
 
-TICKETS_TABLE = """
+# Call order for priorities (urgent first) as a column the call-next index
+# can sort on; generated, so it can never disagree with `priority`.
+PRIORITY_RANK_SQL = (
+    "CASE priority WHEN 'urgent' THEN 1 WHEN 'high' THEN 2 "
+    "WHEN 'normal' THEN 3 WHEN 'low' THEN 4 END"
+)
+
+TICKETS_TABLE = f"""
 CREATE TABLE IF NOT EXISTS tickets (
     id TEXT PRIMARY KEY,
     ticket_number TEXT NOT NULL,
@@ -283,14 +363,39 @@ CREATE TABLE IF NOT EXISTS tickets (
     counter_id TEXT,
     called_by TEXT,
     notes TEXT,
-    custom_data TEXT NOT NULL DEFAULT '{}',
+    custom_data TEXT NOT NULL DEFAULT '{{}}',
+    priority_rank INTEGER GENERATED ALWAYS AS ({PRIORITY_RANK_SQL}) VIRTUAL,
     FOREIGN KEY (service_id) REFERENCES services(id),
     FOREIGN KEY (counter_id) REFERENCES counters(id),
     UNIQUE(ticket_number)
-);
+) {TABLE_OPTIONS};
 """
 
-QUEUES_TABLE = """
+# Databases created before priority_rank existed get it appended in place
+TICKETS_PRIORITY_RANK_COLUMN = f"""
+ALTER TABLE tickets ADD COLUMN priority_rank INTEGER GENERATED ALWAYS AS ({PRIORITY_RANK_SQL}) VIRTUAL;
+"""
+
+# Last ticket number issued per service prefix. Numbering bumps this row
+# inside the ticket insert's write transaction, which serializes it across
+# threads and processes without scanning the tickets table.
+TICKET_SEQUENCES_TABLE = f"""
+CREATE TABLE IF NOT EXISTS ticket_sequences (
+    prefix TEXT PRIMARY KEY,
+    last_number INTEGER NOT NULL
+) {TABLE_OPTIONS};
+"""
+
+# Seeds sequences for prefixes that already have tickets (databases created
+# before the table existed); existing rows are left untouched.
+TICKET_SEQUENCES_SEED = """
+INSERT OR IGNORE INTO ticket_sequences (prefix, last_number)
+SELECT s.prefix, COALESCE(MAX(CAST(substr(t.ticket_number, length(s.prefix) + 1) AS INTEGER)), 0)
+FROM services s LEFT JOIN tickets t ON t.service_id = s.id
+GROUP BY s.prefix;
+"""
+
+QUEUES_TABLE = f"""
 CREATE TABLE IF NOT EXISTS queues (
     id TEXT PRIMARY KEY,
     name TEXT NOT NULL,
@@ -300,10 +405,10 @@ CREATE TABLE IF NOT EXISTS queues (
     auto_call_interval_seconds INTEGER NOT NULL DEFAULT 30,
     is_active INTEGER NOT NULL DEFAULT 1,
     created_at TEXT NOT NULL
-);
+) {TABLE_OPTIONS};
 """
 
-DAILY_STATISTICS_TABLE = """
+DAILY_STATISTICS_TABLE = f"""
 CREATE TABLE IF NOT EXISTS daily_statistics (
     id TEXT PRIMARY KEY,
     date TEXT NOT NULL,
@@ -316,19 +421,44 @@ CREATE TABLE IF NOT EXISTS daily_statistics (
     average_service_time_minutes REAL NOT NULL,
     peak_hour_tickets INTEGER NOT NULL,
     peak_hour_start INTEGER NOT NULL,
+    -- Running totals behind the averages, bumped on each ticket transition
+    wait_time_count INTEGER NOT NULL DEFAULT 0,
+    wait_time_total_minutes REAL NOT NULL DEFAULT 0,
+    service_time_count INTEGER NOT NULL DEFAULT 0,
+    service_time_total_minutes REAL NOT NULL DEFAULT 0,
     FOREIGN KEY (service_id) REFERENCES services(id),
     UNIQUE(date, service_id)
-);
+) {TABLE_OPTIONS};
 """
 
+# Databases created before the running totals existed get them appended;
+# their rows are then rebuilt from the tickets table once
+DAILY_STATISTICS_TOTALS_COLUMNS = [
+    "ALTER TABLE daily_statistics ADD COLUMN wait_time_count INTEGER NOT NULL DEFAULT 0;",
+    "ALTER TABLE daily_statistics ADD COLUMN wait_time_total_minutes REAL NOT NULL DEFAULT 0;",
+    "ALTER TABLE daily_statistics ADD COLUMN service_time_count INTEGER NOT NULL DEFAULT 0;",
+    "ALTER TABLE daily_statistics ADD COLUMN service_time_total_minutes REAL NOT NULL DEFAULT 0;",
+]
+
 # =============================================================================
 # INDEXES FOR PERFORMANCE
 # =============================================================================
 
 TICKETS_INDEXES = [
-    "CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);",
+    # Covers waiting/serving listings per service without probing the table;
+    # supersedes the single-column status index
+    "DROP INDEX IF EXISTS idx_tickets_status;",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_queue ON tickets(status, service_id, created_at, counter_id, ticket_number);",
     "CREATE INDEX IF NOT EXISTS idx_tickets_service_created ON tickets(service_id, created_at);",
-    "CREATE INDEX IF NOT EXISTS idx_tickets_counter ON tickets(counter_id);",
+    # Call-next walks the (small) waiting set in call order and stops at the
+    # first ticket for one of the counter's services
+    "CREATE INDEX IF NOT EXISTS idx_tickets_waiting_rank ON tickets(priority_rank, created_at, service_id) WHERE status = 'waiting';",
+    # Today's completed tickets (average wait) as a range on created_at
+    "CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets(status, created_at);",
+    # A counter's latest call comes straight off the index, no sort;
+    # supersedes the single-column counter index
+    "DROP INDEX IF EXISTS idx_tickets_counter;",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_counter_called ON tickets(counter_id, called_at);",
     "CREATE INDEX IF NOT EXISTS idx_tickets_number ON tickets(ticket_number);",
 ]
 
@@ -7,46 +7,90 @@ and solver configuration used.
 """
 
 import hashlib
+import time
+from functools import lru_cache
+from importlib.metadata import version
 import scipy
 import numpy
-import pvlib
 from datetime import datetime
+from backend.config import FRONTEND_BASE_URL
 from backend.models.entities import SolverConfig, AnalysisMode
 
+# Distinct solver configurations seen by one process are few
+AUDIT_ID_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=1)
 def generate_runtime_signature() -> str:
     """
     Captures the exact version of the scientific stack.
     If the underlying math libraries change, the audit ID must change.
+    
+    Versions cannot change within a process, so this is computed once. pvlib
+    is read from package metadata (its own __version__ source) instead of
+    importing the whole library at startup.
     """
-    return f"scipy:{scipy.__version__}|numpy:{numpy.__version__}|pvlib:{pvlib.__version__}"
+    return f"scipy:{scipy.__version__}|numpy:{numpy.__version__}|pvlib:{version('pvlib')}"
+
+# Settings are hashed as (field, value) pairs sorted by field name; the order
+# is fixed by the model, so it is computed once rather than per call
+_SETTINGS_FIELDS = tuple(sorted(SolverConfig.model_fields))
+
 
 def generate_physics_audit_id(solver_config: SolverConfig) -> str:
     """
     Creates a unique fingerprint for the scientific environment.
     Combines library versions + solver settings.
     """
-    env_string = generate_runtime_signature()
-    
-    # Sort settings for determinism
-    settings_dict = solver_config.model_dump()
-    settings_str = str(sorted(settings_dict.items()))
-    
-    combined = f"{env_string}::{settings_str}"
+    return _audit_id_for_settings(
+        tuple((name, getattr(solver_config, name)) for name in _SETTINGS_FIELDS)
+    )
+
+
+@lru_cache(maxsize=1)
+def _env_prefix_hash():
+    """SHA-256 state after absorbing the "<runtime signature>::" prefix."""
+    return hashlib.sha256(f"{generate_runtime_signature()}::".encode("utf-8"))
+
+
+@lru_cache(maxsize=AUDIT_ID_CACHE_SIZE)
+def _audit_id_for_settings(settings: tuple) -> str:
+    """SHA-256 audit ID for sorted (field, value) settings pairs."""
+    # Hashes exactly "<env>::<settings>" as before; the settings repr is part
+    # of the published ID format and must not change.
+    h = _env_prefix_hash().copy()
+    h.update(str(list(settings)).encode("utf-8"))
     
     # Return first 12 chars of SHA-256
-    return hashlib.sha256(combined.encode("utf-8")).hexdigest()[:12]
+    return h.hexdigest()[:12]
+
+# FRONTEND_BASE_URL is fixed per process, so it is baked into the template
+_BIBTEX_TEMPLATE = (
+    "@manual{helios_core_%(id)s,\n"
+    "  title = {Helios Core Scientific Analysis (Kernel: %(id)s)},\n"
+    "  author = {Helios Core Research Suite},\n"
+    "  year = {%(year)d},\n"
+    "  note = {Analysis Mode: %(mode)s, Deterministic Fit Engine},\n"
+    "  url = {" + FRONTEND_BASE_URL.replace("%", "%%") + "/verify/%(id)s}\n"
+    "}"
+)
+
+_year = 0
+_year_ends_at = 0.0
+
+
+def _current_year() -> int:
+    """Local calendar year, recomputed only once the cached year has ended."""
+    global _year, _year_ends_at
+    now = time.time()
+    if now >= _year_ends_at:
+        _year = datetime.fromtimestamp(now).year
+        _year_ends_at = datetime(_year + 1, 1, 1).timestamp()
+    return _year
+
 
 def generate_bibtex(audit_id: str, mode: AnalysisMode, analysis_id: str) -> str:
     """
     Generates a publication-ready BibTeX entry.
     """
-    from backend.config import FRONTEND_BASE_URL
-    year = datetime.now().year
-    
-    return f"""@manual{{helios_core_{audit_id},
-  title = {{Helios Core Scientific Analysis (Kernel: {audit_id})}},
-  author = {{Helios Core Research Suite}},
-  year = {{{year}}},
-  note = {{Analysis Mode: {mode.value}, Deterministic Fit Engine}},
-  url = {{{FRONTEND_BASE_URL}/verify/{audit_id}}}
-}}"""
+    return _BIBTEX_TEMPLATE % {"id": audit_id, "year": _current_year(), "mode": mode.value}
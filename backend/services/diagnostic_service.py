@@ -5,10 +5,67 @@ Implements B.L.A.S.T. Protocol: Boundary, Linear, Adversarial, Stress, Transpare
 
 import numpy as np
 import json
-from typing import Dict, Any, List, Optional
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 import hashlib
-from datetime import datetime
+
+from backend.models.entities import utc_now
+
+# Parameters compared between clean and noise-perturbed fits
+NOISE_PARAMETERS = ('Jsc', 'Voc', 'FF', 'Rs', 'Rsh', 'n')
+
+# Autocorrelation lags inspected for classification confidence
+CONFIDENCE_LAGS = (1, 2, 3, 4)
+
+# Residual warning level -> contribution to the overall risk score
+RISK_BY_WARNING = {
+    "LOW": 10,
+    "MEDIUM": 40,
+    "HIGH": 70,
+    "CRITICAL": 90
+}
+
+
+def _nested_poly_leading(x: np.ndarray, y: np.ndarray):
+    """
+    Leading coefficients of the degree 1, 2 and 3 least-squares fits of y on x.
+
+    All three fits share one column-scaled Vandermonde matrix and one QR
+    factorisation: with columns ordered 1, x, x^2, x^3 the first k+1 columns
+    of Q span exactly the degree-k design, so each nested fit is a small
+    triangular solve. Matches np.polyfit(x, y, k)[0] for k = 1, 2, 3.
+    """
+    V = np.vander(x, 4, increasing=True)
+    scale = np.sqrt((V * V).sum(axis=0))
+    scale[scale == 0] = 1.0
+    V /= scale
+
+    if len(x) >= 4:
+        Q, R = np.linalg.qr(V)
+        diag = np.abs(np.diag(R))
+        if diag.min() > diag.max() * len(x) * np.finfo(float).eps:
+            # Leading blocks of an upper-triangular inverse are the inverses
+            # of the leading blocks, so one 4x4 inverse serves every degree
+            R_inv = np.linalg.inv(R)
+            qty = Q.T @ y
+            return tuple(
+                (R_inv[k, :k + 1] @ qty[:k + 1]) / scale[k]
+                for k in (1, 2, 3)
+            )
+
+    # Rank-deficient design (too few or repeated voltages): minimum-norm
+    # solutions over column views of the same scaled matrix, as polyfit does
+    return tuple(
+        np.linalg.lstsq(V[:, :k + 1], y, rcond=len(x) * np.finfo(float).eps)[0][k] / scale[k]
+        for k in (1, 2, 3)
+    )
+
+
+def _as_bound_value(value: Optional[float], missing: float) -> float:
+    """Substitute a sentinel for absent parameters/bounds before vectorising."""
+    return missing if value is None else value
+
 
 @dataclass
 class DiagnosticReport:
@@ -17,10 +74,18 @@ class DiagnosticReport:
     def __init__(self, analysis_id: str, mode: str):
         self.analysis_id = analysis_id
         self.mode = mode
-        self.timestamp = datetime.utcnow().isoformat()
+        self._timestamp: Optional[str] = None
         self.residuals: Optional[Dict[str, Any]] = None
         self.noise_stability: Optional[Dict[str, Any]] = None
         self.boundary_stress: Optional[Dict[str, Any]] = None
+        self._report_bytes: Optional[bytes] = None
+    
+    @property
+    def timestamp(self) -> str:
+        """UTC ISO timestamp, taken when the report is first rendered."""
+        if self._timestamp is None:
+            self._timestamp = utc_now().isoformat()
+        return self._timestamp
     
     def analyze_residuals(self, voltage: np.ndarray, 
                          measured: np.ndarray, 
@@ -35,26 +100,30 @@ class DiagnosticReport:
         ptp_residuals = np.ptp(residuals) if len(residuals) > 1 else 0.0
         
         if len(voltage) > 1:
+            # Linear, quadratic and cubic fits from a single factorisation
+            slope, quad_coeff, cubic_coeff = _nested_poly_leading(voltage, residuals)
+
             # 1. Linear trend analysis
-            slope, intercept = np.polyfit(voltage, residuals, 1)
-            # Handle correlation coef
-            corr_matrix = np.corrcoef(voltage, residuals)
-            if corr_matrix.shape == (2, 2):
-                r_squared = corr_matrix[0, 1]**2
-            else:
-                r_squared = 0.0
+            # Pearson correlation from running sums (no covariance matrix)
+            n = len(voltage)
+            sx, sy = voltage.sum(), residuals.sum()
+            sxx = voltage @ voltage
+            syy = residuals @ residuals
+            sxy = voltage @ residuals
+            denom = (n * sxx - sx * sx) * (n * syy - sy * sy)
+            r_squared = (n * sxy - sx * sy)**2 / denom if denom > 0 else 0.0
             
             # 2. Quadratic curvature analysis
-            poly2 = np.polyfit(voltage, residuals, 2)
-            quad_strength = abs(poly2[0]) * ptp_voltage**2
+            ptp_v2 = ptp_voltage * ptp_voltage
+            quad_strength = abs(quad_coeff) * ptp_v2
             
             # 3. S-shape detection (cubic analysis)
-            poly3 = np.polyfit(voltage, residuals, 3)
-            cubic_strength = abs(poly3[0]) * ptp_voltage**3
+            cubic_strength = abs(cubic_coeff) * (ptp_v2 * ptp_voltage)
         else:
             slope, r_squared, quad_strength, cubic_strength = 0.0, 0.0, 0.0, 0.0
         
         # Classification logic
+        slope_threshold = 0.05 * (ptp_residuals / ptp_voltage if ptp_voltage > 0 else 1.0)
         if cubic_strength > 0.15 * rms:
             pattern = "s_shaped"
             warning = "CRITICAL"
@@ -63,7 +132,7 @@ class DiagnosticReport:
             pattern = "systematic_curvature"
             warning = "HIGH"
             message = "Systematic curvature suggests model mismatch"
-        elif abs(slope) > 0.05 * (ptp_residuals / ptp_voltage if ptp_voltage > 0 else 1.0):
+        elif abs(slope) > slope_threshold:
             pattern = "linear_trend"
             warning = "MEDIUM"
             message = "Linear trend indicates potential series resistance error"
@@ -91,27 +160,50 @@ class DiagnosticReport:
                                noisy_results_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze parameter stability under noise perturbation"""
         
-        drifts = {}
-        for param in ['Jsc', 'Voc', 'FF', 'Rs', 'Rsh', 'n']:
-            # Handle key variations if necessary (e.g., 'j_sc' vs 'Jsc')
-            # For this service we expect normalized keys, or we utilize a mapper.
-            # Assuming input keys match requirements or are handled by caller.
-            clean_val = clean_results.get(param, 0.0)
-            if clean_val == 0:
-                continue
-                
-            # Calculate drift for each noise instance
-            param_drifts = []
-            for noisy_result in noisy_results_list:
-                noisy_val = noisy_result.get(param, 0.0)
-                drift = abs(noisy_val - clean_val) / clean_val
-                param_drifts.append(drift)
-            
-            drifts[param] = {
-                "mean": float(np.mean(param_drifts)),
-                "std": float(np.std(param_drifts)),
-                "max": float(np.max(param_drifts))
-            }
+        # Handle key variations if necessary (e.g., 'j_sc' vs 'Jsc')
+        # For this service we expect normalized keys, or we utilize a mapper.
+        # Assuming input keys match requirements or are handled by caller.
+        params = [p for p in NOISE_PARAMETERS if clean_results.get(p, 0.0) != 0]
+        clean = np.array([clean_results[p] for p in params], dtype=float)
+        
+        # Pack the per-iteration dicts into one (iterations x parameters) block
+        noisy = np.array(
+            [[r.get(p, 0.0) for r in noisy_results_list] for p in params],
+            dtype=float,
+        ).reshape(len(params), len(noisy_results_list)).T
+        
+        return self.analyze_noise_stability_arrays(parameters, clean, noisy, params)
+    
+    def analyze_noise_stability_arrays(self, parameters: Dict[str, Any],
+                                       clean_vec: np.ndarray,
+                                       noisy_matrix: np.ndarray,
+                                       param_names: List[str]) -> Dict[str, Any]:
+        """
+        Analyze parameter stability from column-per-parameter arrays.
+        
+        clean_vec holds one value per name in param_names and noisy_matrix
+        one row per noise iteration, so callers that already hold their fits
+        as arrays skip the dict packing of analyze_noise_stability.
+        """
+        clean_vec = np.asarray(clean_vec, dtype=float)
+        noisy_matrix = np.asarray(noisy_matrix, dtype=float)
+        n_iterations = noisy_matrix.shape[0]
+        
+        # Parameters with a zero clean value have no relative drift
+        valid = clean_vec != 0
+        params = [p for p, ok in zip(param_names, valid) if ok]
+        clean = clean_vec[valid]
+        
+        # One contiguous row per parameter for the reductions
+        noisy = np.ascontiguousarray(noisy_matrix[:, valid].T)
+        relative = np.abs(noisy - clean[:, None]) / clean[:, None]
+
+        drifts = {
+            param: {"mean": float(mean), "std": float(std), "max": float(peak)}
+            for param, mean, std, peak in zip(
+                params, relative.mean(axis=1), relative.std(axis=1), relative.max(axis=1)
+            )
+        } if params else {}
         
         # Calculate overall stability score (0-100%)
         # Lower drift = higher score
@@ -129,7 +221,7 @@ class DiagnosticReport:
             "parameter_drifts": drifts,
             "worst_case_drift": worst_case,
             "noise_level_tested": 0.02,  # 2% Gaussian noise - standardized anchor
-            "n_iterations": len(noisy_results_list)
+            "n_iterations": n_iterations
         }
         
         return self.noise_stability
@@ -141,14 +233,23 @@ class DiagnosticReport:
         boundary_hits = []
         recommendations = []
         
-        # Check each parameter against bounds
-        for param, (lower, upper) in bounds.items():
-            value = parameters.get(param)
-            if value is None:
-                continue
+        # Check all parameters against their bounds in one comparison;
+        # missing values/bounds become NaN/inf so they never register a hit
+        names = list(bounds)
+        values = np.array([_as_bound_value(parameters.get(p), np.nan) for p in names], dtype=float)
+        lowers = np.array([_as_bound_value(bounds[p][0], -np.inf) for p in names], dtype=float)
+        uppers = np.array([_as_bound_value(bounds[p][1], np.inf) for p in names], dtype=float)
+        
+        # Within 10% of a bound; the lower bound takes precedence
+        lower_hits = values <= lowers * 1.1
+        upper_hits = ~lower_hits & (values >= uppers * 0.9)
+        
+        for idx in np.flatnonzero(lower_hits | upper_hits):
+            param = names[idx]
+            lower, upper = bounds[param]
+            value = parameters[param]
             
-            # Calculate distance to boundaries (normalized)
-            if lower is not None and value <= lower * 1.1:  # Within 10% of bound
+            if lower_hits[idx]:
                 boundary_hits.append({
                     "parameter": param,
                     "value": float(value),
@@ -163,7 +264,7 @@ class DiagnosticReport:
                 elif param == 'Rsh' and value <= 10:
                     recommendations.append(f"Low shunt resistance ({value:.1f} Ω). Check for shunts or degradation.")
                     
-            elif upper is not None and value >= upper * 0.9:  # Within 10% of bound
+            else:
                 boundary_hits.append({
                     "parameter": param,
                     "value": float(value),
@@ -194,12 +295,7 @@ class DiagnosticReport:
         risk_factors = []
         
         if self.residuals:
-            residual_risk = {
-                "LOW": 10,
-                "MEDIUM": 40,
-                "HIGH": 70,
-                "CRITICAL": 90
-            }.get(self.residuals["warning"], 50)
+            residual_risk = RISK_BY_WARNING.get(self.residuals["warning"], 50)
             risk_factors.append(residual_risk)
         
         if self.noise_stability:
@@ -229,7 +325,10 @@ class DiagnosticReport:
             }
         }
         
-        # Add hash for immutability
+        # Add hash for immutability (SHA-256 like every other provenance
+        # hash; OpenSSL's SHA-NI path outruns blake2b on supported CPUs).
+        # The hashed form stays json.dumps with sorted keys so report hashes
+        # match those issued by earlier releases.
         try:
             report_str = json.dumps(report, sort_keys=True)
             report["hash"] = hashlib.sha256(report_str.encode()).hexdigest()
@@ -237,23 +336,41 @@ class DiagnosticReport:
             # Fallback for non-serializable types if any creep in
             report["hash"] = "hashing_failed"
         
+        # The response body is encoded separately (orjson, insertion order)
+        try:
+            self._report_bytes = orjson.dumps(report, option=orjson.OPT_SERIALIZE_NUMPY)
+        except orjson.JSONEncodeError:
+            self._report_bytes = None
+        
         return report
     
+    def generate_report_bytes(self) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """
+        Generate the report together with its JSON encoding.
+        
+        The bytes are encoded with orjson alongside the report, so the HTTP
+        layer can send them without encoding the report again. They are None
+        when the report could not be serialized.
+        """
+        report = self.generate_report()
+        return report, self._report_bytes
+    
     def _calculate_confidence(self, residuals: np.ndarray) -> float:
         """Calculate confidence in residual classification"""
         # Based on how well residuals match expected patterns
         if len(residuals) < 5:
             return 0.0
             
-        autocorr = np.correlate(residuals, residuals, mode='full')
-        autocorr = autocorr[len(autocorr)//2:]
-        if autocorr[0] == 0:
+        # Only lags 0-4 are used, so take them as dot products over
+        # shifted views instead of the full O(N^2) correlation
+        zero_lag = residuals @ residuals
+        if zero_lag == 0:
             return 0.0
             
-        autocorr = autocorr / autocorr[0]
+        autocorr = np.array([residuals[:-k] @ residuals[k:] for k in CONFIDENCE_LAGS]) / zero_lag
         
         # Random residuals have quick autocorrelation decay
-        decay_rate = np.mean(np.abs(autocorr[1:5]))
+        decay_rate = np.mean(np.abs(autocorr))
         confidence = 100 * (1 - decay_rate)
         
         return float(np.clip(confidence, 0, 100))
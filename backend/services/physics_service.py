@@ -8,6 +8,9 @@ Extracts deeper physical parameters from light and dark IV curves.
 - Dual-analysis comparison (Light+Dark)
 """
 
+import math
+from bisect import bisect_right
+
 import numpy as np
 from typing import Dict, Any, List, Optional
 from backend.models.entities import ExtractedParameters, MeasurementType
@@ -16,6 +19,18 @@ from backend.models.entities import ExtractedParameters, MeasurementType
 K_BOLTZMANN = 1.380649e-23  # J/K
 Q_ELECTRON = 1.602176634e-19  # C
 
+# Ideality-factor bins for recombination classification. 1.2 and 2.2 close
+# the bin below them, hence the next-float-up edges for bisect_right.
+RECOMBINATION_BOUNDS = (0.8, math.nextafter(1.2, math.inf), 1.8, math.nextafter(2.2, math.inf))
+RECOMBINATION_LABELS = (
+    "Below unity (Potential measurement artifact)",
+    "Radiative/Band-to-band",
+    "SRH / Trap-assisted (Depletion Region)",
+    "SRH / Diffusion-limited (Quasi-neutral Region)",
+    "Complex (Tunneling / Multi-level / Barriers)",
+)
+
+
 def extract_ideality_from_slope(
     voltage: np.ndarray, 
     current: np.ndarray, 
@@ -29,6 +44,9 @@ def extract_ideality_from_slope(
     For Light measurements:
     I = I_ph - I_dark => I_dark = I_ph - I
     Approximating I_ph with J_sc, we analyze ln(|J_sc - J|) vs V.
+    
+    Deliberately not memoised: hashing the arrays for a cache key costs
+    about as much as the closed-form fit itself.
     """
     vt = K_BOLTZMANN * (temp_c + 273.15) / Q_ELECTRON
     
@@ -42,30 +60,41 @@ def extract_ideality_from_slope(
         # Analyze the shifted curve (diode component)
         # Note: current is typically negative in power region in our convention
         # J_dark = J_ph - J. If J_ph ~ J_sc and J is negative: J_dark = J_sc - J
+        # For light curves the general forward-bias mask below usually suffices
+        # (no explicit 0.7-0.95 Voc window).
         abs_i = np.abs(j_sc - current)
     else:
         abs_i = np.abs(current)
     
+    return _ideality_from_diode_current(voltage, abs_i, vt)
+
+
+def _ideality_from_diode_current(voltage: np.ndarray, abs_i: np.ndarray, vt: float) -> float:
+    """
+    Slope kernel: fit ln(|I_diode|) vs V in forward bias and return n.
+    
+    Light/dark preprocessing is done by the caller, so this path is the
+    same for every measurement type.
+    """
     # Filter for forward bias where exponential dominates (V > 3Vt)
     # Also ignore points too close to noise floor or rollover
+    # (a searchsorted slice would need an O(N) monotonicity check first,
+    # which costs more than this single fused mask)
     mask = (voltage > 3 * vt) & (abs_i > 1e-9)
-    if is_light and j_sc is not None:
-        # For light curves, only fit the region approaching Voc, 
-        # but avoid the high-injection/series-resistance dominated highest bias
-        # Typical range: 0.7*Voc to 0.95*Voc
-        pass # The general mask often works if filter is right
-
     if np.count_nonzero(mask) < 5:
         return 0.0
         
     v_fit = voltage[mask]
-    ln_i_fit = np.log(abs_i[mask])
+    ln_i_fit = abs_i[mask]
+    np.log(ln_i_fit, out=ln_i_fit)
     
-    # Linear fit
-    try:
-        slope, _ = np.polyfit(v_fit, ln_i_fit, 1)
-    except:
+    # Linear fit: closed-form least-squares slope on centred voltages
+    # (same solution as polyfit(..., 1) without the Vandermonde/SVD)
+    dv = v_fit - v_fit.mean()
+    sxx = dv @ dv
+    if not sxx > 0:
         return 0.0
+    slope = (dv @ ln_i_fit) / sxx
     
     if slope <= 0:
         return 0.0
@@ -75,19 +104,60 @@ def extract_ideality_from_slope(
     # Sanity check: n > 5 is usually a sign of bad fitting/data
     return float(n) if n < 10.0 else 0.0
 
+def extract_ideality_batch(
+    voltage: np.ndarray,
+    current: np.ndarray,
+    temp_c: float = 25.0,
+    is_light: bool = False,
+    j_sc: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Batched extract_ideality_from_slope for M curves sampled on (M, N) grids.
+    
+    Every row goes through the same forward-bias mask and closed-form slope
+    with masked reductions along axis 1, so a temperature series or pixel
+    map costs one pass instead of M calls. Rows that fail the single-curve
+    checks come back as 0.0, matching the scalar function.
+    """
+    voltage = np.atleast_2d(np.asarray(voltage, dtype=float))
+    current = np.atleast_2d(np.asarray(current, dtype=float))
+    vt = K_BOLTZMANN * (temp_c + 273.15) / Q_ELECTRON
+    
+    if is_light:
+        if j_sc is None:
+            # Per-row mean current near V=0, else the first sample
+            near_zero = np.abs(voltage) < 0.05
+            counts = near_zero.sum(axis=1)
+            near_zero_mean = np.where(near_zero, current, 0.0).sum(axis=1) / np.maximum(counts, 1)
+            j_sc = np.where(counts > 0, near_zero_mean, current[:, 0])
+        abs_i = np.abs(np.asarray(j_sc, dtype=float).reshape(-1, 1) - current)
+    else:
+        abs_i = np.abs(current)
+    
+    mask = (voltage > 3 * vt) & (abs_i > 1e-9)
+    n_used = mask.sum(axis=1)
+    
+    # Masked, centred moments; excluded points contribute exactly zero
+    v_mean = np.where(mask, voltage, 0.0).sum(axis=1) / np.maximum(n_used, 1)
+    dv = np.where(mask, voltage - v_mean[:, None], 0.0)
+    ln_i = np.log(np.where(mask, abs_i, 1.0))
+    sxx = np.einsum('ij,ij->i', dv, dv)
+    sxy = np.einsum('ij,ij->i', dv, ln_i)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        n = 1.0 / (slope * vt)
+    
+    valid = (n_used >= 5) & (sxx > 0) & (slope > 0) & (n < 10.0)
+    return np.where(valid, n, 0.0)
+
 def estimate_recombination_mechanism(n: float) -> str:
     """Classify recombination based on ideality factor."""
     if n <= 0:
         return "Invalid/Unreliable"
-    if 0.8 <= n <= 1.2:
-        return "Radiative/Band-to-band"
-    if 1.2 < n < 1.8:
-        return "SRH / Trap-assisted (Depletion Region)"
-    if 1.8 <= n <= 2.2:
-        return "SRH / Diffusion-limited (Quasi-neutral Region)"
-    if n > 2.2:
-        return "Complex (Tunneling / Multi-level / Barriers)"
-    return "Below unity (Potential measurement artifact)"
+    if math.isnan(n):
+        return RECOMBINATION_LABELS[0]
+    return RECOMBINATION_LABELS[bisect_right(RECOMBINATION_BOUNDS, n)]
 
 def calculate_dual_metrics(
     light_params: ExtractedParameters, 
@@ -99,19 +169,20 @@ def calculate_dual_metrics(
     if dark_params is None:
         return light_params
         
-    updated = light_params.model_copy()
-    
     # Assign dark values for comparison
-    updated.n_dark = dark_params.n_ideality
-    updated.n_light = light_params.n_ideality
-    updated.i_0_dark = dark_params.i_0
-    updated.r_s_dark = dark_params.r_s
-    updated.r_sh_dark = dark_params.r_sh
+    updates = {
+        "n_dark": dark_params.n_ideality,
+        "n_light": light_params.n_ideality,
+        "i_0_dark": dark_params.i_0,
+        "r_s_dark": dark_params.r_s,
+        "r_sh_dark": dark_params.r_sh,
+    }
     
-    if updated.n_dark and updated.n_light:
-        updated.delta_n = updated.n_light - updated.n_dark
+    if updates["n_dark"] and updates["n_light"]:
+        updates["delta_n"] = updates["n_light"] - updates["n_dark"]
         
-    return updated
+    # Both inputs are validated models, so a single shallow copy suffices
+    return light_params.model_copy(update=updates)
 
 def estimate_defect_density(n: float, v_oc: float, temp_c: float) -> float:
     """
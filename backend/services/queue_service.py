@@ -5,17 +5,130 @@ Core business logic for queue operations.
 Follows deterministic patterns and maintains data integrity.
 """
 
-import json
+import collections
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
-from uuid import UUID, uuid4
+from uuid import UUID
 
+import orjson
+
+from backend.models.entities import utc_now
 from backend.models.queue_entities import (
-    Ticket, TicketStatus, Counter, CounterStatus, Service, Queue,
-    QueueState, CounterState, Priority, ServiceType
+    Ticket, TicketStatus, Counter, Service, Queue, Priority,
+    QueueState, CounterState, uuid7, pack_uuids, unpack_uuids,
+    SERVICES_TABLE, COUNTERS_TABLE, TICKETS_TABLE, QUEUES_TABLE,
+    DAILY_STATISTICS_TABLE, DAILY_STATISTICS_TOTALS_COLUMNS,
+    TICKET_SEQUENCES_TABLE, TICKET_SEQUENCES_SEED, TICKETS_PRIORITY_RANK_COLUMN, TICKETS_INDEXES, COUNTERS_INDEXES,
+    STATISTICS_INDEXES
+)
+
+# Applied to every pooled connection. With WAL, synchronous=NORMAL only
+# syncs at checkpoints (commits stay atomic), and the page cache/mmap stay
+# warm because connections are reused instead of reopened per call.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+)
+
+# Each connection keeps an LRU of compiled statements keyed by SQL text.
+# Hot-path statements are fixed strings below, and the remaining queries
+# only vary by a bounded set of filters, so this comfortably holds them all.
+STATEMENT_CACHE_SIZE = 256
+
+INSERT_TICKET_SQL = """
+    INSERT INTO tickets
+    (id, ticket_number, service_id, customer_name, customer_phone, customer_email,
+     status, priority, created_at, called_at, service_started_at, completed_at,
+     counter_id, called_by, notes, custom_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_TICKET_SQL = "SELECT * FROM tickets WHERE id = ?"
+
+# Ticket fields in tickets-table column order, which is also the field order
+# of the Ticket model (and so of its JSON)
+TICKET_FIELDS = (
+    "id", "ticket_number", "service_id", "customer_name", "customer_phone",
+    "customer_email", "status", "priority", "created_at", "called_at",
+    "service_started_at", "completed_at", "counter_id", "called_by", "notes",
+    "custom_data",
 )
 
+RESERVE_TICKET_NUMBERS_SQL = """
+    INSERT INTO ticket_sequences (prefix, last_number) VALUES (?, ?)
+    ON CONFLICT(prefix) DO UPDATE SET last_number = last_number + excluded.last_number
+"""
+
+LAST_TICKET_NUMBER_SQL = "SELECT last_number FROM ticket_sequences WHERE prefix = ?"
+
+# Status transitions re-check the current status in the UPDATE itself, so
+# when two workers race on a ticket only one transition applies (and the
+# daily statistics count it once)
+START_TICKET_SQL = """
+    UPDATE tickets
+    SET status = 'in_progress', service_started_at = ?
+    WHERE id = ? AND status = 'called'
+"""
+
+COMPLETE_TICKET_SQL = """
+    UPDATE tickets
+    SET status = 'completed', completed_at = ?
+    WHERE id = ? AND status = 'in_progress'
+"""
+
+CANCEL_TICKET_SQL = """
+    UPDATE tickets
+    SET status = 'cancelled', notes = COALESCE(notes, '') || ?
+    WHERE id = ? AND status NOT IN ('completed', 'cancelled')
+"""
+
+# Adds one transition's deltas to a service's row for the day its tickets
+# were created; averages are re-derived from the running totals, so no
+# ticket is re-read
+RECORD_DAILY_STATISTICS_SQL = """
+    INSERT INTO daily_statistics
+    (id, date, service_id, total_tickets, completed_tickets, cancelled_tickets,
+     no_show_tickets, average_wait_time_minutes, average_service_time_minutes,
+     peak_hour_tickets, peak_hour_start, wait_time_count, wait_time_total_minutes,
+     service_time_count, service_time_total_minutes)
+    VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, 0, 0, ?, ?, ?, ?)
+    ON CONFLICT(date, service_id) DO UPDATE SET
+        total_tickets = total_tickets + excluded.total_tickets,
+        completed_tickets = completed_tickets + excluded.completed_tickets,
+        cancelled_tickets = cancelled_tickets + excluded.cancelled_tickets,
+        wait_time_count = wait_time_count + excluded.wait_time_count,
+        wait_time_total_minutes = wait_time_total_minutes + excluded.wait_time_total_minutes,
+        service_time_count = service_time_count + excluded.service_time_count,
+        service_time_total_minutes = service_time_total_minutes + excluded.service_time_total_minutes,
+        average_wait_time_minutes = COALESCE(
+            (wait_time_total_minutes + excluded.wait_time_total_minutes)
+            / NULLIF(wait_time_count + excluded.wait_time_count, 0), 0.0),
+        average_service_time_minutes = COALESCE(
+            (service_time_total_minutes + excluded.service_time_total_minutes)
+            / NULLIF(service_time_count + excluded.service_time_count, 0), 0.0)
+"""
+
+# Full per-day aggregate, only used to rebuild statistics rows once when
+# the running totals are first added to an existing database
+DAILY_STATISTICS_REBUILD_SQL = """
+    SELECT
+        substr(created_at, 1, 10), service_id, COUNT(*),
+        SUM(status = 'completed'), SUM(status = 'cancelled'), SUM(status = 'no_show'),
+        COUNT(called_at),
+        TOTAL((julianday(called_at) - julianday(created_at)) * 24 * 60),
+        COUNT(CASE WHEN completed_at IS NOT NULL AND service_started_at IS NOT NULL THEN 1 END),
+        TOTAL(CASE WHEN completed_at IS NOT NULL AND service_started_at IS NOT NULL
+            THEN (julianday(completed_at) - julianday(service_started_at)) * 24 * 60 END)
+    FROM tickets
+    GROUP BY 1, 2
+"""
+
 
 class QueueService:
     """
@@ -25,19 +138,67 @@ class QueueService:
     
     def __init__(self, db_path: str = "helios_queue.db"):
         self.db_path = db_path
+        # Services and counters are never modified after creation, so they are
+        # served from in-memory indexes. Tickets change state and always come
+        # from the database. Lookups read the dicts directly; the lock only
+        # orders writers (creation, misses filled from the database, refresh).
+        self._services: dict[UUID, Service] = {}
+        self._counters: dict[UUID, Counter] = {}
+        self._index_lock = threading.Lock()
+        # Routes call in from worker threads. All writes share one connection
+        # under this lock; reads check out a pooled connection of their own.
+        # The lock only guards that connection: numbering and claiming are
+        # single write transactions in SQLite, which also keeps them atomic
+        # against other processes writing to the same database.
+        self._write_lock = threading.Lock()
+        self._write_conn = self._connect()
+        self._readers: queue.SimpleQueue = queue.SimpleQueue()
         self._initialize_database()
+        self.refresh_indexes()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection usable from any worker thread."""
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _get_connection(self, write: bool = False):
+        """
+        Borrow a database connection.
+        
+        write=True yields the shared writer under the write lock and commits
+        on success (rolls back on error). Otherwise a reader is taken from
+        the pool, or opened if all are busy, and returned afterwards.
+        """
+        if write:
+            with self._write_lock:
+                try:
+                    yield self._write_conn
+                    self._write_conn.commit()
+                except BaseException:
+                    self._write_conn.rollback()
+                    raise
+            return
+        
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
     
     def _initialize_database(self):
         """Initialize database with required tables and indexes."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection(write=True) as conn:
             conn.execute("PRAGMA foreign_keys = ON")
-            
-            # Import table definitions
-            from backend.models.queue_entities import (
-                SERVICES_TABLE, COUNTERS_TABLE, TICKETS_TABLE, QUEUES_TABLE,
-                DAILY_STATISTICS_TABLE, TICKETS_INDEXES, COUNTERS_INDEXES,
-                STATISTICS_INDEXES
-            )
+            # WAL is persistent in the database file: readers stop blocking on writers
+            conn.execute("PRAGMA journal_mode = WAL")
             
             # Create tables
             conn.execute(SERVICES_TABLE)
@@ -45,18 +206,50 @@ class QueueService:
             conn.execute(TICKETS_TABLE)
             conn.execute(QUEUES_TABLE)
             conn.execute(DAILY_STATISTICS_TABLE)
+            conn.execute(TICKET_SEQUENCES_TABLE)
+            
+            # Migrate tickets tables created before the priority_rank column
+            ticket_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(tickets)")}
+            if "priority_rank" not in ticket_columns:
+                conn.execute(TICKETS_PRIORITY_RANK_COLUMN)
+            
+            statistics_columns = {row[1] for row in conn.execute("PRAGMA table_info(daily_statistics)")}
+            if "wait_time_count" not in statistics_columns:
+                for column_sql in DAILY_STATISTICS_TOTALS_COLUMNS:
+                    conn.execute(column_sql)
+                self._rebuild_daily_statistics(conn)
             
             # Create indexes
             for index_sql in TICKETS_INDEXES + COUNTERS_INDEXES + STATISTICS_INDEXES:
                 conn.execute(index_sql)
             
-            conn.commit()
+            conn.execute(TICKET_SEQUENCES_SEED)
+    
+    def refresh_indexes(self):
+        """
+        Reload the service and counter indexes from the database.
+        
+        Call after services or counters are changed outside this instance
+        (another worker process, a migration); lookups switch to the new
+        indexes atomically.
+        """
+        with self._get_connection() as conn:
+            services = {
+                service.id: service
+                for service in map(self._row_to_service, conn.execute("SELECT * FROM services"))
+            }
+            counters = {
+                counter.id: counter
+                for counter in map(self._row_to_counter, conn.execute("SELECT * FROM counters"))
+            }
+        with self._index_lock:
+            self._services, self._counters = services, counters
     
     def create_service(self, service_data: dict) -> Service:
         """Create a new service type."""
         service = Service(**service_data)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO services 
@@ -70,15 +263,16 @@ class QueueService:
                     service.priority_default, service.is_active, service.created_at.isoformat()
                 )
             )
-            conn.commit()
         
+        with self._index_lock:
+            self._services[service.id] = service
         return service
     
     def create_counter(self, counter_data: dict) -> Counter:
         """Create a new service counter."""
         counter = Counter(**counter_data)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO counters
@@ -87,129 +281,147 @@ class QueueService:
                 """,
                 (
                     str(counter.id), counter.name, counter.number, counter.location,
-                    counter.status, json.dumps(counter.services_offered),
+                    counter.status, pack_uuids(counter.services_offered),
                     counter.current_operator,
                     counter.opened_at.isoformat() if counter.opened_at else None
                 )
             )
-            conn.commit()
         
+        with self._index_lock:
+            self._counters[counter.id] = counter
         return counter
     
-    def generate_ticket(self, service_id: UUID, customer_data: dict = None) -> Ticket:
+    def generate_ticket(self, service_id: UUID, customer_data: Optional[dict] = None) -> Ticket:
         """
         Generate a new ticket with sequential numbering.
         Follows deterministic ticket numbering patterns.
         """
+        return self.generate_tickets_bulk(service_id, [customer_data])[0]
+    
+    def generate_tickets_bulk(self, service_id: UUID, customers: List[Optional[dict]]) -> List[Ticket]:
+        """
+        Generate one ticket per customer dict in a single transaction.
+        
+        Numbers are reserved as one consecutive block and every row is
+        written by one executemany, so issuing N tickets costs one commit.
+        """
         service = self._get_service(service_id)
         if not service:
             raise ValueError(f"Service {service_id} not found")
+        if not customers:
+            return []
         
-        # Generate ticket number with prefix and sequential number
-        ticket_number = self._generate_ticket_number(service.prefix)
-        
-        ticket_data = {
-            "service_id": service_id,
-            "ticket_number": ticket_number,
-            "customer_name": customer_data.get("name") if customer_data else None,
-            "customer_phone": customer_data.get("phone") if customer_data else None,
-            "customer_email": customer_data.get("email") if customer_data else None,
-            "priority": customer_data.get("priority", service.priority_default) if customer_data else service.priority_default,
-            "notes": customer_data.get("notes") if customer_data else None,
-            "custom_data": customer_data.get("custom_data", {}) if customer_data else {}
-        }
-        
-        ticket = Ticket(**ticket_data)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO tickets
-                (id, ticket_number, service_id, customer_name, customer_phone, customer_email,
-                 status, priority, created_at, called_at, service_started_at, completed_at,
-                 counter_id, called_by, notes, custom_data)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    str(ticket.id), ticket.ticket_number, str(ticket.service_id),
-                    ticket.customer_name, ticket.customer_phone, ticket.customer_email,
-                    ticket.status, ticket.priority, ticket.created_at.isoformat(),
-                    ticket.called_at.isoformat() if ticket.called_at else None,
-                    ticket.service_started_at.isoformat() if ticket.service_started_at else None,
-                    ticket.completed_at.isoformat() if ticket.completed_at else None,
-                    str(ticket.counter_id) if ticket.counter_id else None,
-                    ticket.called_by, ticket.notes, json.dumps(ticket.custom_data)
-                )
+        with self._get_connection(write=True) as conn:
+            # Generate ticket numbers with prefix and sequential number
+            ticket_numbers = self._generate_ticket_numbers(service.prefix, len(customers), conn)
+            
+            tickets = []
+            for ticket_number, customer_data in zip(ticket_numbers, customers):
+                customer_data = customer_data or {}
+                # An explicit None (unset in the API request) also means "service default"
+                priority = Priority(customer_data.get("priority") or service.priority_default)
+                
+                # Every field is either checked above or already validated by the
+                # API request model, so the ticket is built without re-validation
+                tickets.append(Ticket.model_construct(
+                    service_id=service_id,
+                    ticket_number=ticket_number,
+                    customer_name=customer_data.get("name"),
+                    customer_phone=customer_data.get("phone"),
+                    customer_email=customer_data.get("email"),
+                    priority=priority,
+                    notes=customer_data.get("notes"),
+                    custom_data=customer_data.get("custom_data") or {},
+                ))
+            
+            conn.executemany(
+                INSERT_TICKET_SQL,
+                [
+                    (
+                        str(ticket.id), ticket.ticket_number, str(ticket.service_id),
+                        ticket.customer_name, ticket.customer_phone, ticket.customer_email,
+                        ticket.status, ticket.priority, ticket.created_at.isoformat(),
+                        ticket.called_at.isoformat() if ticket.called_at else None,
+                        ticket.service_started_at.isoformat() if ticket.service_started_at else None,
+                        ticket.completed_at.isoformat() if ticket.completed_at else None,
+                        str(ticket.counter_id) if ticket.counter_id else None,
+                        ticket.called_by, ticket.notes, self._encode_custom_data(ticket.custom_data)
+                    )
+                    for ticket in tickets
+                ]
             )
-            conn.commit()
+            
+            for day, issued in collections.Counter(t.created_at.date().isoformat() for t in tickets).items():
+                self._update_daily_statistics(conn, service_id, day, total=issued)
         
-        return ticket
+        return tickets
     
-    def _generate_ticket_number(self, prefix: str) -> str:
-        """Generate sequential ticket number for service prefix."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT ticket_number FROM tickets WHERE ticket_number LIKE ? ORDER BY ticket_number DESC LIMIT 1",
-                (f"{prefix}%",)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                last_number = int(result[0][len(prefix):])
-                next_number = last_number + 1
-            else:
-                next_number = 1
-            
-            return f"{prefix}{next_number:03d}"
+    def _generate_ticket_numbers(self, prefix: str, count: int, conn) -> List[str]:
+        """Reserve `count` consecutive ticket numbers for a service prefix."""
+        # The upsert takes SQLite's write lock for the caller's transaction,
+        # so concurrent writers (other workers included) get disjoint blocks
+        conn.execute(RESERVE_TICKET_NUMBERS_SQL, (prefix, count))
+        last_number = conn.execute(LAST_TICKET_NUMBER_SQL, (prefix,)).fetchone()[0]
+        
+        first_number = last_number - count + 1
+        return [f"{prefix}{number:03d}" for number in range(first_number, last_number + 1)]
     
-    def call_next_ticket(self, counter_id: UUID, operator_name: str = None) -> Optional[Ticket]:
+    def call_next_ticket(self, counter_id: UUID, operator_name: Optional[str] = None) -> Optional[Ticket]:
         """Call the next ticket for a counter."""
         counter = self._get_counter(counter_id)
         if not counter:
             raise ValueError(f"Counter {counter_id} not found")
         
-        # Get next ticket in queue for services offered by this counter
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                """
-                SELECT t.*, s.name as service_name
-                FROM tickets t
-                JOIN services s ON t.service_id = s.id
-                WHERE t.status = 'waiting' 
-                AND s.prefix IN (SELECT prefix FROM services WHERE id IN 
-                    (SELECT value FROM json_each(?) WHERE value = id))
-                ORDER BY 
-                    CASE t.priority 
-                        WHEN 'urgent' THEN 1 
-                        WHEN 'high' THEN 2 
-                        WHEN 'normal' THEN 3 
-                        WHEN 'low' THEN 4 
-                    END,
-                    t.created_at ASC
-                LIMIT 1
+        if not counter.services_offered:
+            return None
+        
+        # Claim the next ticket for services offered by this counter
+        # (highest priority first, then oldest) in a single statement, so
+        # two counters, in this process or another, can never call the same one
+        params = [utc_now().isoformat(), str(counter_id), operator_name]
+        params += [str(sid) for sid in counter.services_offered]
+        with self._get_connection(write=True) as conn:
+            # fetchall() steps the statement to completion before the commit
+            rows = conn.execute(
+                f"""
+                UPDATE tickets
+                SET status = 'called', called_at = ?, counter_id = ?, called_by = ?
+                WHERE id = ({self._next_waiting_query("t.id", counter)})
+                RETURNING *
                 """,
-                (json.dumps([str(sid) for sid in counter.services_offered]),)
-            )
-            result = cursor.fetchone()
-            
-            if not result:
+                params
+            ).fetchall()
+            if not rows:
                 return None
             
-            # Update ticket status
-            ticket_id = result[0]
-            now = datetime.utcnow()
-            
-            conn.execute(
-                """
-                UPDATE tickets 
-                SET status = 'called', called_at = ?, counter_id = ?, called_by = ?
-                WHERE id = ?
-                """,
-                (now.isoformat(), str(counter_id), operator_name, ticket_id)
+            ticket = self._row_to_ticket(rows[0])
+            self._update_daily_statistics(
+                conn, ticket.service_id, ticket.created_at.date().isoformat(),
+                wait_minutes=self._minutes_between(ticket.created_at, ticket.called_at)
             )
-            conn.commit()
         
-        return self._get_ticket_by_id(UUID(ticket_id))
+        return ticket
+    
+    @staticmethod
+    def _next_waiting_query(columns: str, counter: Counter) -> str:
+        """SELECT of the ticket a counter would call next, one ? per service offered."""
+        placeholders = ", ".join("?" * len(counter.services_offered))
+        return f"""
+            SELECT {columns} FROM tickets t
+            WHERE t.status = 'waiting' AND t.service_id IN ({placeholders})
+            ORDER BY t.priority_rank, t.created_at
+            LIMIT 1
+        """
+    
+    def _peek_next_waiting(self, counter: Counter, conn) -> Optional[str]:
+        """Number of the ticket call_next_ticket would claim, without claiming it."""
+        if not counter.services_offered:
+            return None
+        row = conn.execute(
+            self._next_waiting_query("t.ticket_number", counter),
+            [str(sid) for sid in counter.services_offered]
+        ).fetchone()
+        return row[0] if row else None
     
     def start_service(self, ticket_id: UUID) -> Ticket:
         """Mark ticket as being serviced."""
@@ -220,20 +432,13 @@ class QueueService:
         if ticket.status != TicketStatus.CALLED:
             raise ValueError("Only called tickets can be started")
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                UPDATE tickets 
-                SET status = 'in_progress', service_started_at = ?
-                WHERE id = ?
-                """,
-                (datetime.utcnow().isoformat(), str(ticket_id))
-            )
-            conn.commit()
+        with self._get_connection(write=True) as conn:
+            if conn.execute(START_TICKET_SQL, (utc_now().isoformat(), str(ticket_id))).rowcount == 0:
+                raise ValueError("Only called tickets can be started")
         
         return self._get_ticket_by_id(ticket_id)
     
-    def complete_service(self, ticket_id: UUID, satisfaction_score: int = None) -> Ticket:
+    def complete_service(self, ticket_id: UUID, satisfaction_score: Optional[int] = None) -> Ticket:
         """Complete ticket service and update statistics."""
         ticket = self._get_ticket_by_id(ticket_id)
         if not ticket:
@@ -242,25 +447,24 @@ class QueueService:
         if ticket.status != TicketStatus.IN_PROGRESS:
             raise ValueError("Only in-progress tickets can be completed")
         
-        now = datetime.utcnow()
+        now = utc_now()
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                UPDATE tickets 
-                SET status = 'completed', completed_at = ?
-                WHERE id = ?
-                """,
-                (now.isoformat(), str(ticket_id))
-            )
-            conn.commit()
+        with self._get_connection(write=True) as conn:
+            if conn.execute(COMPLETE_TICKET_SQL, (now.isoformat(), str(ticket_id))).rowcount == 0:
+                raise ValueError("Only in-progress tickets can be completed")
             
             # Update daily statistics
-            self._update_daily_statistics(ticket.service_id, conn)
+            service_minutes = None
+            if ticket.service_started_at:
+                service_minutes = self._minutes_between(ticket.service_started_at, now)
+            self._update_daily_statistics(
+                conn, ticket.service_id, ticket.created_at.date().isoformat(),
+                completed=1, service_minutes=service_minutes
+            )
         
         return self._get_ticket_by_id(ticket_id)
     
-    def cancel_ticket(self, ticket_id: UUID, reason: str = None) -> Ticket:
+    def cancel_ticket(self, ticket_id: UUID, reason: Optional[str] = None) -> Ticket:
         """Cancel a ticket."""
         ticket = self._get_ticket_by_id(ticket_id)
         if not ticket:
@@ -269,57 +473,49 @@ class QueueService:
         if ticket.status in [TicketStatus.COMPLETED, TicketStatus.CANCELLED]:
             raise ValueError("Cannot cancel completed or already cancelled tickets")
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                UPDATE tickets 
-                SET status = 'cancelled', notes = COALESCE(notes, '') || ?
-                WHERE id = ?
-                """,
+        with self._get_connection(write=True) as conn:
+            cursor = conn.execute(
+                CANCEL_TICKET_SQL,
                 (f"\nCancelled: {reason}" if reason else "\nCancelled", str(ticket_id))
             )
-            conn.commit()
+            if cursor.rowcount == 0:
+                raise ValueError("Cannot cancel completed or already cancelled tickets")
+            
+            self._update_daily_statistics(
+                conn, ticket.service_id, ticket.created_at.date().isoformat(), cancelled=1
+            )
         
         return self._get_ticket_by_id(ticket_id)
     
-    def get_queue_state(self, service_id: UUID = None) -> QueueState:
+    def get_queue_state(self, service_id: Optional[UUID] = None) -> QueueState:
         """Get current real-time queue state."""
-        with sqlite3.connect(self.db_path) as conn:
-            # Get waiting tickets
-            waiting_query = """
+        with self._get_connection() as conn:
+            # Waiting and currently serving tickets in one pass: waiting ones
+            # have no called_at, so each group comes out in its own order
+            # (waiting by creation, serving by call time)
+            open_query = """
                 SELECT t.* FROM tickets t 
-                WHERE t.status = 'waiting'
+                WHERE t.status IN ('waiting', 'called', 'in_progress')
             """
             params = []
             if service_id:
-                waiting_query += " AND t.service_id = ?"
+                open_query += " AND t.service_id = ?"
                 params.append(str(service_id))
             
-            waiting_query += " ORDER BY t.created_at ASC"
+            open_query += " ORDER BY COALESCE(t.called_at, t.created_at) ASC"
             
             waiting_tickets = []
-            for row in conn.execute(waiting_query, params):
-                waiting_tickets.append(self._row_to_ticket(row))
-            
-            # Get currently serving tickets
-            serving_query = """
-                SELECT t.* FROM tickets t 
-                WHERE t.status IN ('called', 'in_progress')
-            """
-            params = []
-            if service_id:
-                serving_query += " AND t.service_id = ?"
-                params.append(str(service_id))
-            
-            serving_query += " ORDER BY t.called_at ASC"
-            
             currently_serving = []
-            for row in conn.execute(serving_query, params):
-                currently_serving.append(self._row_to_ticket(row))
+            for row in conn.execute(open_query, params):
+                ticket = self._row_to_ticket(row)
+                if ticket.status == TicketStatus.WAITING:
+                    waiting_tickets.append(ticket)
+                else:
+                    currently_serving.append(ticket)
             
             # Calculate wait times
             avg_wait_time = self._calculate_average_wait_time(service_id, conn)
-            estimated_wait = self._estimate_wait_time_new_ticket(service_id, conn)
+            estimated_wait = self._estimate_wait_time_new_ticket(len(waiting_tickets))
             
             # Get counter statuses
             counters_status = []
@@ -334,7 +530,7 @@ class QueueService:
                 })
             
             return QueueState(
-                queue_id=service_id or uuid4(),
+                queue_id=service_id or uuid7(),
                 waiting_tickets=waiting_tickets,
                 currently_serving=currently_serving,
                 average_wait_time_minutes=avg_wait_time,
@@ -348,7 +544,7 @@ class QueueService:
         if not counter:
             raise ValueError(f"Counter {counter_id} not found")
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             # Get current ticket
             cursor = conn.execute(
                 """
@@ -364,69 +560,98 @@ class QueueService:
             # Calculate service time for current ticket
             service_time = None
             if current_ticket and current_ticket.service_started_at:
-                service_time = (datetime.utcnow() - current_ticket.service_started_at).total_seconds() / 60
+                service_time = (utc_now() - current_ticket.service_started_at).total_seconds() / 60
             
-            # Get next ticket
-            next_ticket = self.call_next_ticket(counter_id)
+            # Peek at the next ticket; status polls must not call it
+            next_ticket_number = self._peek_next_waiting(counter, conn)
             
             return CounterState(
                 counter_id=counter_id,
                 status=counter.status,
                 current_ticket=current_ticket,
-                next_ticket_number=next_ticket.ticket_number if next_ticket else None,
+                next_ticket_number=next_ticket_number,
                 operator_name=counter.current_operator,
                 service_time_minutes=service_time
             )
     
-    def get_waiting_list(self, service_id: UUID = None, limit: int = 50) -> List[Ticket]:
+    def get_waiting_list(self, service_id: Optional[UUID] = None, limit: int = 50) -> List[Ticket]:
         """Get current waiting list."""
-        with sqlite3.connect(self.db_path) as conn:
-            query = """
-                SELECT t.* FROM tickets t
-                WHERE t.status = 'waiting'
-            """
-            params = []
-            if service_id:
-                query += " AND t.service_id = ?"
-                params.append(str(service_id))
-            
-            query += " ORDER BY t.created_at ASC LIMIT ?"
-            params.append(limit)
-            
-            waiting_tickets = []
-            for row in conn.execute(query, params):
-                waiting_tickets.append(self._row_to_ticket(row))
-            
-            return waiting_tickets
+        with self._get_connection() as conn:
+            return [self._row_to_ticket(row) for row in self._waiting_rows(conn, service_id, limit)]
+    
+    def get_waiting_list_raw(self, service_id: Optional[UUID] = None, limit: int = 50) -> List[dict]:
+        """
+        Waiting list as JSON-ready dicts, for routes that only serialize it.
+        
+        Values stay as stored (UUID and ISO timestamp strings, custom_data as
+        its JSON text), so no row pays for UUID/datetime parsing or model
+        construction. The dicts serialize with orjson to the same JSON as
+        the Ticket models.
+        """
+        with self._get_connection() as conn:
+            return [self._row_to_ticket_dict(row) for row in self._waiting_rows(conn, service_id, limit)]
+    
+    def _waiting_rows(self, conn, service_id: Optional[UUID], limit: int) -> List[tuple]:
+        """Waiting ticket rows, oldest first."""
+        query = """
+            SELECT t.* FROM tickets t
+            WHERE t.status = 'waiting'
+        """
+        params = []
+        if service_id:
+            query += " AND t.service_id = ?"
+            params.append(str(service_id))
+        
+        query += " ORDER BY t.created_at ASC LIMIT ?"
+        params.append(limit)
+        
+        return conn.execute(query, params).fetchall()
     
     # Helper methods
     def _get_service(self, service_id: UUID) -> Optional[Service]:
-        """Get service by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get service by ID (index first, database for ones created elsewhere)."""
+        service = self._services.get(service_id)
+        if service is not None:
+            return service
+        
+        with self._get_connection() as conn:
             cursor = conn.execute("SELECT * FROM services WHERE id = ?", (str(service_id),))
             row = cursor.fetchone()
-            return self._row_to_service(row) if row else None
+        if not row:
+            return None
+        with self._index_lock:
+            return self._services.setdefault(service_id, self._row_to_service(row))
     
     def _get_counter(self, counter_id: UUID) -> Optional[Counter]:
-        """Get counter by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get counter by ID (index first, database for ones created elsewhere)."""
+        counter = self._counters.get(counter_id)
+        if counter is not None:
+            return counter
+        
+        with self._get_connection() as conn:
             cursor = conn.execute("SELECT * FROM counters WHERE id = ?", (str(counter_id),))
             row = cursor.fetchone()
-            return self._row_to_counter(row) if row else None
+        if not row:
+            return None
+        with self._index_lock:
+            return self._counters.setdefault(counter_id, self._row_to_counter(row))
     
     def _get_ticket_by_id(self, ticket_id: UUID) -> Optional[Ticket]:
         """Get ticket by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT * FROM tickets WHERE id = ?", (str(ticket_id),))
+        with self._get_connection() as conn:
+            cursor = conn.execute(SELECT_TICKET_SQL, (str(ticket_id),))
             row = cursor.fetchone()
             return self._row_to_ticket(row) if row else None
     
+    # Enum columns are passed as their stored strings: pydantic-core resolves
+    # the member natively, which is cheaper than calling the Enum in Python.
+    
     def _row_to_service(self, row) -> Service:
         """Convert database row to Service object."""
         return Service(
-            id=UUID(row[0]), name=row[1], service_type=ServiceType(row[2]),
+            id=UUID(row[0]), name=row[1], service_type=row[2],
             description=row[3], prefix=row[4], estimated_duration_minutes=row[5],
-            priority_default=Priority(row[6]), is_active=bool(row[7]),
+            priority_default=row[6], is_active=bool(row[7]),
             created_at=datetime.fromisoformat(row[8])
         )
     
@@ -434,102 +659,119 @@ class QueueService:
         """Convert database row to Counter object."""
         return Counter(
             id=UUID(row[0]), name=row[1], number=row[2], location=row[3],
-            status=CounterStatus(row[4]), services_offered=json.loads(row[5]),
+            status=row[4], services_offered=unpack_uuids(row[5]),
             current_operator=row[6],
             opened_at=datetime.fromisoformat(row[7]) if row[7] else None
         )
     
     def _row_to_ticket(self, row) -> Ticket:
         """Convert database row to Ticket object."""
-        return Ticket(
-            id=UUID(row[0]), ticket_number=row[1], service_id=UUID(row[2]),
-            customer_name=row[3], customer_phone=row[4], customer_email=row[5],
-            status=TicketStatus(row[6]), priority=Priority(row[7]),
-            created_at=datetime.fromisoformat(row[8]),
-            called_at=datetime.fromisoformat(row[9]) if row[9] else None,
-            service_started_at=datetime.fromisoformat(row[10]) if row[10] else None,
-            completed_at=datetime.fromisoformat(row[11]) if row[11] else None,
-            counter_id=UUID(row[12]) if row[12] else None,
-            called_by=row[13], notes=row[14], custom_data=json.loads(row[15])
-        )
+        # The stored UUID and timestamp strings go to pydantic-core as-is: it
+        # parses them in one validation pass, roughly twice as fast as
+        # UUID()/fromisoformat() in Python followed by validating the results
+        # (and faster than model_construct, which still needs those calls)
+        ticket = dict(zip(TICKET_FIELDS, row))
+        ticket["custom_data"] = orjson.loads(row[15])
+        return Ticket.model_validate(ticket)
+    
+    @staticmethod
+    def _encode_custom_data(custom_data: dict) -> str:
+        """
+        Encode custom_data for its TEXT column.
+        
+        orjson in place of the stdlib codec; non-string keys are stringified
+        as json.dumps did. The column stays TEXT (the table is STRICT, and
+        JSONB needs SQLite 3.45), so existing rows read back unchanged.
+        """
+        return orjson.dumps(custom_data, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    @staticmethod
+    def _row_to_ticket_dict(row) -> dict:
+        """Convert database row to a Ticket-shaped dict without parsing any column."""
+        ticket = dict(zip(TICKET_FIELDS, row))
+        ticket["custom_data"] = orjson.Fragment(row[15])
+        return ticket
+    
+    @staticmethod
+    def _today_bounds() -> Tuple[str, str]:
+        """
+        Today's UTC date and the next one, as ISO strings.
+        
+        created_at is stored as an ISO timestamp, so "created today" is the
+        half-open string range [today, tomorrow), which can use an index
+        where DATE(created_at) = ? cannot.
+        """
+        today = utc_now().date()
+        return today.isoformat(), (today + timedelta(days=1)).isoformat()
     
     def _calculate_average_wait_time(self, service_id: UUID, conn) -> float:
         """Calculate average wait time for completed tickets today."""
-        today = datetime.utcnow().date().isoformat()
-        
         cursor = conn.execute(
             """
             SELECT AVG((julianday(called_at) - julianday(created_at)) * 24 * 60)
             FROM tickets 
             WHERE status = 'completed' 
-            AND DATE(created_at) = ?
+            AND created_at >= ? AND created_at < ?
             AND called_at IS NOT NULL
             """,
-            (today,)
+            self._today_bounds()
         )
         result = cursor.fetchone()
         return float(result[0]) if result[0] else 0.0
     
-    def _estimate_wait_time_new_ticket(self, service_id: UUID, conn) -> int:
-        """Estimate wait time for a new ticket."""
+    @staticmethod
+    def _estimate_wait_time_new_ticket(waiting_count: int) -> int:
+        """Estimate wait time for a new ticket behind `waiting_count` others."""
         avg_service_time = 5  # Default 5 minutes
-        waiting_count = 0
-        
-        if service_id:
-            cursor = conn.execute(
-                """
-                SELECT COUNT(*) FROM tickets 
-                WHERE status = 'waiting' AND service_id = ?
-                """,
-                (str(service_id),)
-            )
-            waiting_count = cursor.fetchone()[0]
-        else:
-            cursor = conn.execute(
-                "SELECT COUNT(*) FROM tickets WHERE status = 'waiting'"
-            )
-            waiting_count = cursor.fetchone()[0]
-        
         return int(waiting_count * avg_service_time)
     
-    def _update_daily_statistics(self, service_id: UUID, conn):
-        """Update daily statistics for a service."""
-        today = datetime.utcnow().date().isoformat()
-        
-        # Calculate today's statistics
-        cursor = conn.execute(
-            """
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled,
-                SUM(CASE WHEN status = 'no_show' THEN 1 ELSE 0 END) as no_show,
-                AVG(CASE WHEN called_at IS NOT NULL 
-                    THEN (julianday(called_at) - julianday(created_at)) * 24 * 60 
-                    ELSE NULL END) as avg_wait,
-                AVG(CASE WHEN completed_at IS NOT NULL AND service_started_at IS NOT NULL 
-                    THEN (julianday(completed_at) - julianday(service_started_at)) * 24 * 60 
-                    ELSE NULL END) as avg_service
-            FROM tickets 
-            WHERE service_id = ? AND DATE(created_at) = ?
-            """,
-            (str(service_id), today)
-        )
-        stats = cursor.fetchone()
+    @staticmethod
+    def _minutes_between(start: datetime, end: datetime) -> float:
+        """Elapsed minutes between two timestamps."""
+        return (end - start).total_seconds() / 60
+    
+    def _update_daily_statistics(
+        self, conn, service_id: UUID, day: str,
+        total: int = 0, completed: int = 0, cancelled: int = 0,
+        wait_minutes: Optional[float] = None, service_minutes: Optional[float] = None
+    ):
+        """
+        Add one transition to a service's daily statistics.
         
-        # Upsert statistics
+        Constant work per call: the row keeps running wait/service totals
+        and counts, and the upsert folds the new sample into them.
+        """
+        wait_count = 0 if wait_minutes is None else 1
+        service_count = 0 if service_minutes is None else 1
         conn.execute(
+            RECORD_DAILY_STATISTICS_SQL,
+            (
+                str(uuid7()), day, str(service_id), total, completed, cancelled,
+                wait_minutes or 0.0, service_minutes or 0.0,
+                wait_count, wait_minutes or 0.0, service_count, service_minutes or 0.0
+            )
+        )
+    
+    def _rebuild_daily_statistics(self, conn):
+        """Recompute every daily statistics row, running totals included, from the tickets."""
+        rows = []
+        for (day, service_id, total, completed, cancelled, no_show,
+             wait_count, wait_total, service_count, service_total) in conn.execute(DAILY_STATISTICS_REBUILD_SQL):
+            rows.append((
+                str(uuid7()), day, service_id, total, completed, cancelled, no_show,
+                wait_total / wait_count if wait_count else 0.0,
+                service_total / service_count if service_count else 0.0,
+                0, 0,  # TODO: Implement peak hour calculation
+                wait_count, wait_total, service_count, service_total
+            ))
+        conn.executemany(
             """
             INSERT OR REPLACE INTO daily_statistics
             (id, date, service_id, total_tickets, completed_tickets, cancelled_tickets,
              no_show_tickets, average_wait_time_minutes, average_service_time_minutes,
-             peak_hour_tickets, peak_hour_start)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             peak_hour_tickets, peak_hour_start, wait_time_count, wait_time_total_minutes,
+             service_time_count, service_time_total_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (
-                str(uuid4()), today, str(service_id), stats[0], stats[1], stats[2], stats[3],
-                float(stats[4]) if stats[4] else 0.0,
-                float(stats[5]) if stats[5] else 0.0,
-                0, 0  # TODO: Implement peak hour calculation
-            )
-        )
\ No newline at end of file
+            rows
+        )
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.api import analyze
+
+
+@pytest.fixture
+def solver(monkeypatch):
+    """Thread-backed stand-in for the solver pool; fits named "slow" block until released"""
+    release = threading.Event()
+    started = []
+    pools = []
+
+    def fake_fit(measurement, **kwargs):
+        started.append(measurement)
+        if measurement.startswith("slow"):
+            release.wait(5)
+        return f"fit:{measurement}"
+
+    def use_pool(workers):
+        pool = ThreadPoolExecutor(max_workers=workers)
+        pools.append(pool)
+        monkeypatch.setattr(analyze, "SOLVER_EXECUTOR", pool)
+        return pool
+
+    monkeypatch.setattr(analyze, "analyze_measurement", fake_fit)
+    yield use_pool, release, started
+    release.set()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _job(name):
+    return analyze._AnalyzeJob(measurement=name, V=None, I=None, mode=None, model_type=None)
+
+
+def test_each_request_gets_its_own_result_without_waiting_on_others(solver):
+    use_pool, release, _ = solver
+    use_pool(2)
+
+    async def scenario():
+        slow = asyncio.ensure_future(analyze._solve(_job("slow")))
+        quick = await asyncio.wait_for(analyze._solve(_job("quick")), 2)
+        assert not slow.done()
+        release.set()
+        return quick, await slow
+
+    assert asyncio.run(scenario()) == ("fit:quick", "fit:slow")
+
+
+def test_cancelled_request_drops_its_queued_fit(solver):
+    use_pool, release, started = solver
+    use_pool(1)
+
+    async def scenario():
+        running = asyncio.ensure_future(analyze._solve(_job("slow")))
+        queued = asyncio.ensure_future(analyze._solve(_job("abandoned")))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        return await running, await analyze._solve(_job("next"))
+
+    assert asyncio.run(scenario()) == ("fit:slow", "fit:next")
+    assert started == ["slow", "next"]
+
+
+def test_broken_pool_is_replaced_and_fit_retried(solver, monkeypatch):
+    use_pool, release, started = solver
+    release.set()
+
+    class BrokenPool:
+        def submit(self, *args, **kwargs):
+            raise analyze.BrokenProcessPool("a solver process died")
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(analyze, "SOLVER_EXECUTOR", BrokenPool())
+    replacement = []
+    monkeypatch.setattr(analyze, "_new_solver_executor", lambda: replacement.append(use_pool(1)) or replacement[0])
+
+    assert asyncio.run(analyze._solve(_job("retried"))) == "fit:retried"
+    assert analyze.SOLVER_EXECUTOR is replacement[0]
+    assert started == ["retried"]
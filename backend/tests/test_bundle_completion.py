@@ -85,6 +85,7 @@ def test_generate_bundle_includes_new_artifacts(mock_entities, tmp_path):
         
         # Verify
         assert bundle_path.exists()
+        assert list(tmp_path.iterdir()) == [bundle_path]  # temp file renamed into place
         
         with zipfile.ZipFile(bundle_path, "r") as zf:
             files = zf.namelist()
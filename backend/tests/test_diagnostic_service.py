@@ -0,0 +1,89 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from backend.services.diagnostic_service import DiagnosticReport, _nested_poly_leading
+
+
+@pytest.mark.parametrize("n_points", [4, 7, 50, 400])
+def test_nested_fits_match_polyfit(n_points):
+    """Single-factorisation fits agree with independent np.polyfit calls"""
+    rng = np.random.default_rng(n_points)
+    V = np.sort(rng.uniform(-0.1, 0.8, n_points))
+    residuals = 1e-4 * V**3 - 2e-4 * V + rng.normal(scale=1e-5, size=n_points)
+
+    fused = _nested_poly_leading(V, residuals)
+    reference = [np.polyfit(V, residuals, deg)[0] for deg in (1, 2, 3)]
+
+    np.testing.assert_allclose(fused, reference, rtol=1e-9)
+
+
+def test_nested_fits_rank_deficient():
+    """Too few distinct voltages falls back to polyfit's minimum-norm solution"""
+    V = np.array([0.1, 0.1, 0.2, 0.2])
+    residuals = np.array([1.0, 2.0, 3.0, 5.0])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        reference = [np.polyfit(V, residuals, deg)[0] for deg in (1, 2, 3)]
+
+    np.testing.assert_allclose(_nested_poly_leading(V, residuals), reference, rtol=1e-9)
+
+
+def test_residual_classification():
+    """Linear and cubic residual shapes map to their warning levels"""
+    V = np.linspace(0.0, 0.7, 200)
+    fitted = np.zeros_like(V)
+
+    linear_report = DiagnosticReport(analysis_id="linear", mode="light")
+    result = linear_report.analyze_residuals(V, 0.01 * V, fitted)
+    assert result["pattern"] == "linear_trend"
+    assert result["warning"] == "MEDIUM"
+    assert result["slope"] == pytest.approx(0.01)
+
+    s_report = DiagnosticReport(analysis_id="s_shape", mode="light")
+    result = s_report.analyze_residuals(V, (V - 0.35)**3, fitted)
+    assert result["pattern"] == "s_shaped"
+    assert result["warning"] == "CRITICAL"
+
+
+def test_noise_stability_array_and_dict_paths_agree():
+    """The SoA entry point gives the same drifts as the list-of-dicts API"""
+    rng = np.random.default_rng(3)
+    clean = {"Jsc": -20.1, "Voc": 0.7, "FF": 0.0, "Rs": 1.2, "n": 1.4}
+    noisy = [{k: v * (1 + rng.normal(scale=0.02)) for k, v in clean.items()} for _ in range(25)]
+
+    from_dicts = DiagnosticReport("dicts", "light").analyze_noise_stability({}, clean, noisy)
+
+    names = list(clean)
+    from_arrays = DiagnosticReport("arrays", "light").analyze_noise_stability_arrays(
+        {},
+        np.array([clean[k] for k in names]),
+        np.array([[r[k] for k in names] for r in noisy]),
+        names,
+    )
+
+    assert from_arrays == from_dicts
+    assert "FF" not in from_dicts["parameter_drifts"]
+    assert from_dicts["n_iterations"] == 25
+
+
+def test_report_bytes_match_report_and_hash():
+    """Pre-encoded report bytes decode to the report, whose hash covers the rest"""
+    import hashlib
+    import json
+    import orjson
+
+    V = np.linspace(0.0, 0.7, 50)
+    report = DiagnosticReport(analysis_id="bytes", mode="light")
+    report.analyze_residuals(V, 0.01 * V, np.zeros_like(V))
+    report.analyze_boundary_stress({"n": 2.6}, {"n": (0.8, 2.5)})
+
+    content, body = report.generate_report_bytes()
+    assert orjson.loads(body) == orjson.loads(orjson.dumps(content))
+
+    unhashed = {k: v for k, v in content.items() if k != "hash"}
+    # Hashes keep the legacy json.dumps(sort_keys=True) form
+    canonical = json.dumps(unhashed, sort_keys=True).encode()
+    assert content["hash"] == hashlib.sha256(canonical).hexdigest()
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from uuid import uuid4
+
+from backend.api import export
+
+
+def test_concurrent_misses_share_one_bundle_build(monkeypatch, tmp_path):
+    """Requests racing on an uncached analysis wait for the same build"""
+    release = threading.Event()
+    builds = []
+
+    def fake_build(analysis, measurement):
+        builds.append(analysis.id)
+        release.wait(5)
+        path = tmp_path / f"bundle_{len(builds)}.zip"
+        path.write_bytes(b"zip")
+        return path
+
+    monkeypatch.setattr(export, "generate_supplementary_bundle", fake_build)
+    analysis = SimpleNamespace(id=uuid4(), result_hash="abc123hash")
+
+    async def scenario():
+        requests = [asyncio.ensure_future(export._get_bundle(analysis, None)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        requests[0].cancel()
+        release.set()
+        results = await asyncio.gather(*requests[1:])
+        cached = await export._get_bundle(analysis, None)
+        return results, cached
+
+    try:
+        results, cached = asyncio.run(scenario())
+    finally:
+        export._bundle_cache.pop(str(analysis.id), None)
+
+    assert builds == [analysis.id]
+    assert {path for path, _ in results} == {cached[0]} == {tmp_path / "bundle_1.zip"}
+    assert export._bundle_builds == {}
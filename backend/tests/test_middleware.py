@@ -0,0 +1,62 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.middleware import PermissiveCORSMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    calls = []
+
+    @app.api_route("/ping", methods=["GET", "OPTIONS"])
+    async def ping():
+        calls.append("ping")
+        return {"pong": True}
+
+    app.add_middleware(PermissiveCORSMiddleware)
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+
+def test_preflight_is_answered_without_reaching_the_app(client):
+    response = client.options("/ping", headers={
+        "Origin": "https://app.example",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "content-type, x-session",
+    })
+
+    assert response.status_code == 200
+    assert response.text == "OK"
+    assert response.headers["access-control-allow-origin"] == "https://app.example"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["access-control-allow-headers"] == "content-type, x-session"
+    assert "POST" in response.headers["access-control-allow-methods"]
+    assert response.headers["access-control-max-age"] == "600"
+    assert client.calls == []
+
+
+def test_cors_request_echoes_origin(client):
+    response = client.get("/ping", headers={"Origin": "https://app.example"})
+
+    assert response.json() == {"pong": True}
+    assert response.headers["access-control-allow-origin"] == "https://app.example"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["vary"] == "Origin"
+
+
+@pytest.mark.parametrize("method, headers", [
+    ("GET", {}),
+    # An OPTIONS without Access-Control-Request-Method is not a preflight
+    ("OPTIONS", {}),
+    ("OPTIONS", {"Origin": "https://app.example"}),
+])
+def test_non_preflight_requests_reach_the_app(client, method, headers):
+    response = client.request(method, "/ping", headers=headers)
+
+    assert response.json() == {"pong": True}
+    assert client.calls == ["ping"]
+    if "Origin" not in headers:
+        assert not any(name.startswith("access-control-") for name in response.headers)
@@ -0,0 +1,24 @@
+import asyncio
+
+from backend.api import queue as queue_api
+
+
+def test_snapshot_built_across_a_write_is_not_cached():
+    """A write landing while a snapshot is built keeps that snapshot out of the cache"""
+    key = ("state", "test")
+
+    def build_during_write():
+        queue_api._invalidate_queue_state()
+        return b'{"stale":true}'
+
+    async def scenario():
+        first = await queue_api._cached_state(key, build_during_write)
+        assert key not in queue_api._queue_state_cache
+        second = await queue_api._cached_state(key, lambda: b'{"fresh":true}')
+        third = await queue_api._cached_state(key, lambda: b'{"unused":true}')
+        return first.body, second.body, third.body
+
+    try:
+        assert asyncio.run(scenario()) == (b'{"stale":true}', b'{"fresh":true}', b'{"fresh":true}')
+    finally:
+        queue_api._invalidate_queue_state()
@@ -0,0 +1,41 @@
+import time
+from uuid import UUID
+
+from backend.models import queue_entities
+from backend.models.queue_entities import pack_uuids, unpack_uuids, uuid7
+
+
+def test_uuid7_sets_version_and_variant():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == "specified in RFC 4122"
+    assert value.int >> 80 <= time.time_ns() // 1_000_000
+
+
+def test_uuid7_sorts_by_creation_time():
+    """Ids minted in later milliseconds sort after earlier ones"""
+    ids = []
+    for _ in range(5):
+        ids.append(uuid7())
+        time.sleep(0.002)
+    assert ids == sorted(ids)
+    assert sorted(str(u) for u in ids) == [str(u) for u in ids]
+
+
+def test_uuid7_stays_unique_across_pool_refills():
+    count = 3 * queue_entities.UUID7_RANDOM_POOL_BYTES // 10
+    assert len({uuid7() for _ in range(count)}) == count
+
+
+def test_pack_uuids_round_trips():
+    ids = [uuid7() for _ in range(3)]
+    packed = pack_uuids(ids)
+    assert len(packed) == 48
+    assert unpack_uuids(packed) == ids
+    assert unpack_uuids(pack_uuids([])) == []
+
+
+def test_unpack_uuids_accepts_legacy_json():
+    ids = [UUID(int=1), UUID(int=2)]
+    assert unpack_uuids(f'["{ids[0]}", "{ids[1]}"]') == ids
+    assert unpack_uuids("[]") == []
@@ -0,0 +1,165 @@
+import pytest
+
+from backend.models.queue_entities import TicketStatus
+from backend.services.queue_service import QueueService
+
+
+@pytest.fixture
+def queue(tmp_path):
+    service = QueueService(str(tmp_path / "queue.db"))
+    desk = service.create_service({
+        "name": "General", "service_type": "general",
+        "description": "Walk-in", "prefix": "A"
+    })
+    counter = service.create_counter({
+        "name": "Desk 1", "number": "1", "location": "Hall",
+        "services_offered": [desk.id]
+    })
+    return service, desk, counter
+
+
+def test_ticket_numbers_are_sequential_past_999(queue):
+    """Numbering follows the sequence, not the lexical order of stored numbers"""
+    service, desk, _ = queue
+    tickets = service.generate_tickets_bulk(desk.id, [None] * 1000)
+    tickets.append(service.generate_ticket(desk.id))
+
+    assert tickets[0].ticket_number == "A001"
+    assert tickets[998].ticket_number == "A999"
+    assert tickets[-1].ticket_number == "A1001"
+    assert len(service.get_waiting_list(desk.id, limit=2000)) == 1001
+
+
+def test_call_next_orders_by_priority_then_age(queue):
+    service, desk, counter = queue
+    service.generate_tickets_bulk(desk.id, [
+        {"priority": p} for p in ("low", "normal", "urgent", "high", "normal")
+    ])
+
+    called = []
+    while (ticket := service.call_next_ticket(counter.id, "Ana")) is not None:
+        assert ticket.status == TicketStatus.CALLED
+        assert ticket.counter_id == counter.id
+        assert ticket.called_by == "Ana"
+        called.append(ticket.ticket_number)
+
+    assert called == ["A003", "A004", "A002", "A005", "A001"]
+
+
+def test_counter_state_peeks_without_calling(queue):
+    """Polling a counter reports the next ticket but leaves it waiting"""
+    service, desk, counter = queue
+    service.generate_tickets_bulk(desk.id, [{"priority": "low"}, {"priority": "high"}])
+
+    for _ in range(3):
+        state = service.get_counter_state(counter.id)
+        assert state.next_ticket_number == "A002"
+        assert state.current_ticket is None
+    assert len(service.get_waiting_list(desk.id)) == 2
+
+    called = service.call_next_ticket(counter.id)
+    state = service.get_counter_state(counter.id)
+    assert state.current_ticket.id == called.id
+    assert state.next_ticket_number == "A001"
+
+
+def test_daily_statistics_totals_match_full_rebuild(queue):
+    """Incremental statistics agree with re-aggregating the tickets table"""
+    service, desk, counter = queue
+    tickets = service.generate_tickets_bulk(desk.id, [None] * 6)
+    for _ in range(4):
+        service.call_next_ticket(counter.id)
+    for ticket in tickets[:3]:
+        service.start_service(ticket.id)
+    for ticket in tickets[:2]:
+        service.complete_service(ticket.id)
+    service.cancel_ticket(tickets[2].id)
+    service.cancel_ticket(tickets[5].id)
+    with pytest.raises(ValueError):
+        service.complete_service(tickets[0].id)
+
+    def statistics():
+        with service._get_connection() as conn:
+            return conn.execute(
+                "SELECT * FROM daily_statistics WHERE service_id = ?", (str(desk.id),)
+            ).fetchall()
+
+    incremental = statistics()
+    with service._get_connection(write=True) as conn:
+        service._rebuild_daily_statistics(conn)
+    rebuilt = statistics()
+
+    assert len(incremental) == len(rebuilt) == 1
+    assert incremental[0][3:7] == rebuilt[0][3:7] == (6, 2, 2, 0)
+    # julianday() keeps milliseconds; the running totals use exact timedeltas
+    assert incremental[0][1:] == pytest.approx(rebuilt[0][1:], abs=1e-3)
+
+
+def test_raw_waiting_list_serializes_like_tickets(queue):
+    """The parse-free waiting list gives the same JSON values as the models"""
+    import orjson
+    from backend.models.queue_entities import TicketListAdapter
+
+    service, desk, _ = queue
+    service.generate_tickets_bulk(desk.id, [
+        {"name": "Ana", "priority": "high", "custom_data": {"lang": "pt", "visits": [1, 2]}},
+        None,
+    ])
+
+    raw = orjson.dumps(service.get_waiting_list_raw(desk.id))
+    models = TicketListAdapter.dump_json(service.get_waiting_list(desk.id))
+    assert orjson.loads(raw) == orjson.loads(models)
+
+
+def test_indexes_pick_up_services_created_elsewhere(queue, tmp_path):
+    """Another instance's services are found on a miss or after a refresh"""
+    service, _, counter = queue
+    other = QueueService(str(tmp_path / "queue.db"))
+    express = other.create_service({
+        "name": "Express", "service_type": "express",
+        "description": "Quick", "prefix": "E"
+    })
+
+    assert service.generate_ticket(express.id).ticket_number == "E001"
+
+    service.refresh_indexes()
+    assert express.id in service._services
+    assert counter.id in service._counters
+
+
+def test_queue_state_partitions_open_tickets(queue):
+    service, desk, counter = queue
+    tickets = service.generate_tickets_bulk(desk.id, [{"priority": "low"}, None, {"priority": "urgent"}, None])
+    first = service.call_next_ticket(counter.id)
+    second = service.call_next_ticket(counter.id)
+    service.start_service(first.id)
+
+    state = service.get_queue_state(desk.id)
+
+    assert [t.ticket_number for t in state.currently_serving] == [first.ticket_number, second.ticket_number]
+    assert [t.id for t in state.waiting_tickets] == [tickets[0].id, tickets[3].id]
+    assert state.estimated_wait_time_new_ticket == 10
+
+
+def test_concurrent_writers_on_one_database_never_share_tickets(queue, tmp_path):
+    """Separate service instances (as in separate worker processes) stay consistent"""
+    import threading
+
+    service, desk, counter = queue
+    instances = [service] + [QueueService(str(tmp_path / "queue.db")) for _ in range(3)]
+    issued, called = [], []
+
+    def work(instance):
+        for _ in range(25):
+            issued.extend(t.ticket_number for t in instance.generate_tickets_bulk(desk.id, [None, None]))
+        while (ticket := instance.call_next_ticket(counter.id)) is not None:
+            called.append(ticket.ticket_number)
+
+    threads = [threading.Thread(target=work, args=(instance,)) for instance in instances]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(issued) == len(set(issued)) == 200
+    assert sorted(called) == sorted(issued)
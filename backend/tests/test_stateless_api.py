@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+import io
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.api import stateless_api
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(stateless_api.router, prefix="/api/stateless")
+    return TestClient(app)
+
+
+def test_number_arrays_validate_to_float64():
+    request = stateless_api.StatelessAnalyzeRequest(
+        voltage=[0, 0.5, 1], current=[1e-3, 2e-3, 3e-3], device_label="cell"
+    )
+    assert request.voltage.dtype == np.float64
+    np.testing.assert_array_equal(request.voltage, [0.0, 0.5, 1.0])
+
+
+@pytest.mark.parametrize("voltage", [
+    {"0": 0.1},
+    [0.1, None, 0.3],
+    [[0.1, 0.2], [0.3, 0.4]],
+    [0.1, "volts"],
+    "0.1,0.2",
+])
+def test_malformed_arrays_are_rejected_with_422(client, voltage):
+    response = client.post("/api/stateless/analyze", json={
+        "voltage": voltage, "current": [1e-3, 2e-3, 3e-3], "device_label": "cell"
+    })
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("field, value", [
+    ("mode", "Fast"),
+    ("model_type", "ThreeDiode"),
+    ("measurement_type", "infrared"),
+])
+def test_unknown_enum_values_are_rejected_with_400(client, field, value):
+    response = client.post("/api/stateless/analyze", json={
+        "voltage": [0.0, 0.5], "current": [1e-3, 0.0], "device_label": "cell", field: value
+    })
+    assert response.status_code == 400
+    assert value in response.json()["detail"]
+    assert "expected one of" in response.json()["detail"]
+
+
+def test_upload_over_declared_limit_is_rejected_with_413(client, monkeypatch):
+    monkeypatch.setattr(stateless_api, "MAX_UPLOAD_BYTES", 64)
+    response = client.post(
+        "/api/stateless/process", files={"file": ("iv.csv", b"V,I\n" + b"0.1,0.001\n" * 20)}
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_upload_stops_at_limit(monkeypatch):
+    """Without a usable Content-Length the limit is enforced while reading"""
+    monkeypatch.setattr(stateless_api, "MAX_UPLOAD_BYTES", 64)
+    monkeypatch.setattr(stateless_api, "UPLOAD_CHUNK_SIZE", 16)
+
+    content, digest = asyncio.run(stateless_api._read_upload(UploadFile(io.BytesIO(b"x" * 64))))
+    assert content == b"x" * 64
+    assert digest == hashlib.sha256(content).hexdigest()
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(stateless_api._read_upload(UploadFile(io.BytesIO(b"x" * 65))))
+    assert excinfo.value.status_code == 413
@@ -6,19 +6,21 @@ Per FRD §4: Bundle contains PDF, CSV, audit.json, and reproduce_analysis.py.
 """
 
 import json
+import os
+import threading
 import zipfile
 import io
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+from uuid import uuid4
 
 import numpy as np
-import matplotlib.pyplot as plt
-plt.switch_backend('Agg')
 
 from backend.config import EXPORTS_DIR, GLOBAL_RNG_SEED
-from backend.models.entities import Analysis, Measurement
+from backend.models.entities import Analysis, Measurement, utc_now
 from backend.tools.ingest_file import extract_iv_data
 from backend.tools.solve_iv_curve import one_diode_equation, two_diode_equation
 from backend.services.citation_service import generate_physics_audit_id, generate_bibtex
@@ -29,6 +31,12 @@ def generate_results_csv(analysis: Analysis) -> str:
     return _generate_results_csv(analysis)
 
 
+def iter_results_csv(analysis: Analysis) -> Iterator[bytes]:
+    """Yield the results CSV line by line, for streaming responses."""
+    for line in _iter_results_csv_lines(analysis):
+        yield line.encode()
+
+
 def generate_supplementary_bundle(
     analysis: Analysis,
     measurement: Measurement,
@@ -51,8 +59,22 @@ def generate_supplementary_bundle(
     
     bundle_name = f"helios_bundle_{str(analysis.id)[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     bundle_path = EXPORTS_DIR / f"{bundle_name}.zip"
+    # Builds started in the same second share bundle_name; each writes its own
+    # temp file and the finished zip is renamed into place atomically.
+    tmp_path = EXPORTS_DIR / f".{bundle_name}.{uuid4().hex}.tmp"
+    try:
+        _write_bundle(tmp_path, analysis, measurement)
+        os.replace(tmp_path, bundle_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
     
-    with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_DEFLATED) as zf:
+    return bundle_path
+
+
+def _write_bundle(path: Path, analysis: Analysis, measurement: Measurement) -> None:
+    """Write the bundle zip contents to path."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
         # 1. Audit JSON
         audit_data = _generate_audit_json(analysis, measurement)
         zf.writestr("audit.json", json.dumps(audit_data, indent=2, default=str))
@@ -91,15 +113,13 @@ def generate_supplementary_bundle(
         # 8. README
         readme = _generate_readme(analysis, measurement)
         zf.writestr("README.md", readme)
-    
-    return bundle_path
 
 
 def _generate_audit_json(analysis: Analysis, measurement: Measurement) -> dict:
     """Generate complete audit trail."""
     return {
         "helios_core_version": "1.0.0",
-        "export_timestamp": datetime.utcnow().isoformat(),
+        "export_timestamp": utc_now().isoformat(),
         "analysis": {
             "id": str(analysis.id),
             "measurement_id": str(analysis.measurement_id),
@@ -145,7 +165,7 @@ def _generate_reproduction_script(analysis: Analysis, measurement: Measurement)
     script = f'''#!/usr/bin/env python3
 """
 Helios Core — Reproduction Script
-Generated: {datetime.utcnow().isoformat()}
+Generated: {utc_now().isoformat()}
 Analysis ID: {analysis.id}
 
 This script reproduces the analysis results independently.
@@ -247,38 +267,40 @@ if __name__ == "__main__":
 
 def _generate_results_csv(analysis: Analysis) -> str:
     """Generate CSV of extracted parameters."""
+    return "".join(_iter_results_csv_lines(analysis))
+
+
+def _iter_results_csv_lines(analysis: Analysis) -> Iterator[str]:
+    """Yield newline-terminated rows of the extracted parameters CSV."""
     params = analysis.parameters
     
+    yield "Parameter,Value,Unit\n"
     if params is None:
-        return "Parameter,Value,Unit\nError,No parameters extracted,N/A\n"
+        yield "Error,No parameters extracted,N/A\n"
+        return
     
-    lines = [
-        "Parameter,Value,Unit",
-        f"Jsc,{params.j_sc:.4f},mA/cm2",
-        f"Voc,{params.v_oc:.4f},V",
-        f"FF,{params.ff:.4f},",
-        f"PCE,{params.pce:.2f},%",
-        f"Rs,{params.r_s:.4f},ohm.cm2",
-        f"Rsh,{params.r_sh:.2f},ohm.cm2",
-        f"n,{params.n_ideality:.4f},",
-    ]
+    yield f"Jsc,{params.j_sc:.4f},mA/cm2\n"
+    yield f"Voc,{params.v_oc:.4f},V\n"
+    yield f"FF,{params.ff:.4f},\n"
+    yield f"PCE,{params.pce:.2f},%\n"
+    yield f"Rs,{params.r_s:.4f},ohm.cm2\n"
+    yield f"Rsh,{params.r_sh:.2f},ohm.cm2\n"
+    yield f"n,{params.n_ideality:.4f},\n"
     
     if params.residual_rms is not None:
-        lines.append(f"Residual_RMS,{params.residual_rms:.6e},A")
+        yield f"Residual_RMS,{params.residual_rms:.6e},A\n"
     
     # Physics Metrics
     if params.n_dark is not None:
-        lines.append(f"n_dark,{params.n_dark:.4f},")
+        yield f"n_dark,{params.n_dark:.4f},\n"
     if params.i_0_dark is not None:
-        lines.append(f"I0_dark,{params.i_0_dark:.4e},A")
+        yield f"I0_dark,{params.i_0_dark:.4e},A\n"
     if params.r_s_dark is not None:
-        lines.append(f"Rs_dark,{params.r_s_dark:.4f},ohm.cm2")
+        yield f"Rs_dark,{params.r_s_dark:.4f},ohm.cm2\n"
     if params.r_sh_dark is not None:
-        lines.append(f"Rsh_dark,{params.r_sh_dark:.2f},ohm.cm2")
+        yield f"Rsh_dark,{params.r_sh_dark:.2f},ohm.cm2\n"
     if params.delta_n is not None:
-        lines.append(f"delta_n,{params.delta_n:.4f},")
-    
-    return "\n".join(lines) + "\n"
+        yield f"delta_n,{params.delta_n:.4f},\n"
 
 
 def _generate_latex_table(analysis: Analysis) -> str:
@@ -326,9 +348,28 @@ def _generate_report_svg(analysis: Analysis, measurement: Measurement) -> Option
     return _generate_mpl_plot(analysis, measurement, format="svg")
 
 
+# pyplot keeps global figure state and bundles are built from worker threads
+_PLOT_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _pyplot():
+    """pyplot on the Agg backend, imported on first plot rather than at app startup."""
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+    return plt
+
+
 def _generate_mpl_plot(analysis: Analysis, measurement: Measurement, format: str) -> Optional[bytes]:
-    """Internal helper to generate matplotlib plots."""
+    """Internal helper to generate matplotlib plots (serialized across threads)."""
+    with _PLOT_LOCK:
+        return _render_mpl_plot(analysis, measurement, format)
+
+
+def _render_mpl_plot(analysis: Analysis, measurement: Measurement, format: str) -> Optional[bytes]:
     try:
+        plt = _pyplot()
+        
         # Load raw data
         V, I = extract_iv_data(measurement, measurement.column_map or analysis.solver_config)
         area = measurement.metadata.cell_area_cm2
@@ -388,7 +429,7 @@ def _generate_readme(analysis: Analysis, measurement: Measurement) -> str:
 
 **Analysis ID:** {analysis.id}  
 **Mode:** {analysis.mode.value}  
-**Generated:** {datetime.utcnow().isoformat()}  
+**Generated:** {utc_now().isoformat()}  
 
 ## Contents
 
@@ -9,11 +9,10 @@ Per SOP_DATA_INGESTION:
 - Same file → same ImportRecord (hash-based)
 """
 
-import hashlib
 import re
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 from uuid import uuid4
 
 import numpy as np
@@ -30,6 +29,7 @@ from backend.tools.manage_storage import (
     create_import_record,
     create_measurement,
     get_import_record_by_hash,
+    list_measurements_for_import,
     store_raw_file,
 )
 
@@ -291,7 +291,7 @@ def detect_multi_pixel_columns(df: pd.DataFrame) -> list[tuple[str, str]]:
 # =============================================================================
 
 def ingest_file(
-    file_content: bytes,
+    file_content: Union[bytes, BinaryIO],
     filename: str,
     metadata: Optional[MeasurementMetadata] = None,
 ) -> tuple[ImportRecord, list[Measurement]]:
@@ -308,7 +308,8 @@ def ingest_file(
     7. Emit Measurement records
     
     Args:
-        file_content: Raw file bytes
+        file_content: Raw file bytes, or a binary file object (e.g. an
+            upload's spooled temp file) read here, off the event loop
         filename: Original filename
         metadata: Optional measurement metadata
     
@@ -321,16 +322,18 @@ def ingest_file(
     if metadata is None:
         metadata = MeasurementMetadata()
     
-    # Step 3: Store raw file (Self-healing: always ensure file exists on disk)
-    raw_path, _ = store_raw_file(file_content, filename)
+    # Step 1: Receive raw file. Hashing, header sniffing and delimiter
+    # detection all need the full content, so it is materialized once here.
+    if not isinstance(file_content, bytes):
+        file_content = file_content.read()
     
-    # Step 2: Compute hash
-    file_hash = hashlib.sha256(file_content).hexdigest()
+    # Steps 2-3: Store raw file (Self-healing: always ensure file exists on disk).
+    # store_raw_file already hashes the content for its path; reuse that digest.
+    raw_path, file_hash = store_raw_file(file_content, filename)
     
     # Check for existing import (Idempotency)
     existing = get_import_record_by_hash(file_hash)
     if existing is not None:
-        from backend.tools.manage_storage import list_measurements_for_import
         print(f"[Ingest] File already exists (hash {file_hash[:8]}). Returning existing records.")
         measurements = list_measurements_for_import(existing.id)
         return existing, measurements
@@ -436,6 +439,18 @@ def ingest_file(
     return import_record, measurements
 
 
+# Header patterns for device area, compiled once at import
+_AREA_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"device\s*area\s*[:=\t,]\s*([\d\.]+)",
+        r"area\s*\(?cm2\)?\s*[:=\t,]\s*([\d\.]+)",
+        r"area\s*\(?cm\^2\)?\s*[:=\t,]\s*([\d\.]+)",
+    )
+)
+_FIELD_SEP = re.compile(r"[\t,]")
+
+
 def extract_area_from_header(content_str: str) -> Optional[float]:
     """
     Attempt to extract device area from file header content.
@@ -443,27 +458,24 @@ def extract_area_from_header(content_str: str) -> Optional[float]:
     """
     try:
         # Look for common area patterns in the first 4000 chars
-        area_patterns = [
-            r"device\s*area\s*[:=\t,]\s*([\d\.]+)",
-            r"area\s*\(?cm2\)?\s*[:=\t,]\s*([\d\.]+)",
-            r"area\s*\(?cm\^2\)?\s*[:=\t,]\s*([\d\.]+)",
-        ]
-        for pattern in area_patterns:
-            match = re.search(pattern, content_str[:4000], re.IGNORECASE)
+        head = content_str[:4000]
+        for pattern in _AREA_PATTERNS:
+            match = pattern.search(head)
             if match:
                 area = float(match.group(1))
                 return area
         
         # Special case for tabular metadata like SA71_light__1.dat
-        lines = content_str.split('\n')
+        # Only the first six lines are inspected, so don't split the whole file
+        lines = content_str.split('\n', 6)
         if len(lines) > 2:
             # Check the first few lines for "device area"
             for i in range(min(5, len(lines))):
-                headers = [h.strip().lower() for h in re.split(r'[\t,]', lines[i])]
+                headers = [h.strip().lower() for h in _FIELD_SEP.split(lines[i])]
                 if "device area" in headers:
                     idx = headers.index("device area")
                     if i + 1 < len(lines):
-                        values = re.split(r'[\t,]', lines[i+1])
+                        values = _FIELD_SEP.split(lines[i+1])
                         if len(values) > idx:
                             try:
                                 return float(values[idx].strip())
@@ -501,6 +513,16 @@ def _is_numeric(s):
     except (ValueError, TypeError):
         return False
 
+# Shared by every read_csv attempt. The C tokenizer is pinned explicitly, and
+# low_memory=False infers dtypes from the whole column in one pass instead of
+# chunk by chunk.
+_READ_CSV_OPTIONS = {
+    "engine": "c",
+    "low_memory": False,
+    "skipinitialspace": True,
+}
+
+
 def _parse_to_dataframe(
     content: bytes, 
     filename: str, 
@@ -521,7 +543,7 @@ def _parse_to_dataframe(
                     BytesIO(content),
                     sep=sep,
                     encoding=encoding,
-                    skipinitialspace=True,
+                    **_READ_CSV_OPTIONS,
                 )
                 if len(df.columns) >= 2:
                     # Check if the header itself looks like numeric data
@@ -531,7 +553,7 @@ def _parse_to_dataframe(
                             BytesIO(content),
                             sep=sep,
                             encoding=encoding,
-                            skipinitialspace=True,
+                            **_READ_CSV_OPTIONS,
                             header=None
                         )
                         # Name them generically
@@ -563,7 +585,7 @@ def _parse_to_dataframe(
                                     sep=sep,
                                     encoding=encoding,
                                     header=None,
-                                    skipinitialspace=True,
+                                    **_READ_CSV_OPTIONS,
                                 )
                                 df.columns = [str(i) for i in range(len(df.columns))]
                     
@@ -586,7 +608,7 @@ def _parse_to_dataframe(
                         BytesIO(content),
                         sep=sep,
                         encoding=encoding,
-                        skipinitialspace=True,
+                        **_READ_CSV_OPTIONS,
                     )
                     if len(df.columns) >= 2:
                         return df
@@ -12,18 +12,24 @@ Per SOP_PERSISTENCE:
 import hashlib
 import json
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 from uuid import UUID
 
+from cachetools import TTLCache
+
 from backend.config import DATABASE_PATH, RAW_DATA_DIR
 from backend.models.entities import (
     Analysis,
-    AnalysisStatus,
+    ColumnMap,
+    ExtractedParameters,
     ImportRecord,
     Measurement,
+    MeasurementMetadata,
+    SolverConfig,
     IMPORT_RECORD_TABLE,
     MEASUREMENT_TABLE,
     ANALYSIS_TABLE,
@@ -55,6 +61,36 @@ def get_connection():
         conn.close()
 
 
+# =============================================================================
+# ENTITY CACHE
+# =============================================================================
+
+# Import records, measurements and analyses are write-once per ID, so rows
+# that were found can be served from memory. Misses are never cached: the row
+# may be written moments later by another process (e.g. a solver worker).
+ENTITY_CACHE_SIZE = 10_000
+ENTITY_CACHE_TTL = 60  # seconds
+
+_entity_cache = TTLCache(maxsize=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL)
+_entity_cache_lock = threading.Lock()
+
+
+def _cache_get(kind: str, entity_id: UUID):
+    with _entity_cache_lock:
+        return _entity_cache.get((kind, str(entity_id)))
+
+
+def _cache_put(kind: str, entity_id: UUID, entity) -> None:
+    with _entity_cache_lock:
+        _entity_cache[(kind, str(entity_id))] = entity
+
+
+def clear_entity_cache() -> None:
+    """Drop all cached entities (e.g. after pointing at another database)."""
+    with _entity_cache_lock:
+        _entity_cache.clear()
+
+
 def initialize_database() -> None:
     """Create database tables if they don't exist and handle migrations."""
     with get_connection() as conn:
@@ -69,6 +105,12 @@ def initialize_database() -> None:
         except sqlite3.OperationalError:
             # Column already exists
             pass
+        
+        # Migration: Add fitted_current to analyses if missing
+        try:
+            cursor.execute("ALTER TABLE analyses ADD COLUMN fitted_current BLOB")
+        except sqlite3.OperationalError:
+            pass
 
 
 # =============================================================================
@@ -144,11 +186,16 @@ def create_import_record(record: ImportRecord) -> ImportRecord:
                 int(record.low_confidence_flag),
             )
         )
+    _cache_put("import_record", record.id, record)
     return record
 
 
 def get_import_record(record_id: UUID) -> Optional[ImportRecord]:
     """Fetch ImportRecord by ID."""
+    cached = _cache_get("import_record", record_id)
+    if cached is not None:
+        return cached
+    
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
@@ -158,7 +205,9 @@ def get_import_record(record_id: UUID) -> Optional[ImportRecord]:
         row = cursor.fetchone()
         if row is None:
             return None
-        return _row_to_import_record(row)
+        entity = _row_to_import_record(row)
+    _cache_put("import_record", record_id, entity)
+    return entity
 
 
 def get_import_record_by_hash(file_hash: str) -> Optional[ImportRecord]:
@@ -185,13 +234,12 @@ def list_import_records() -> list[ImportRecord]:
 
 def _row_to_import_record(row: sqlite3.Row) -> ImportRecord:
     """Convert database row to ImportRecord."""
-    from backend.models.entities import ColumnMap, HardwareProfile
     return ImportRecord(
         id=UUID(row["id"]),
         source_filename=row["source_filename"],
         file_hash=row["file_hash"],
         ingestion_timestamp=datetime.fromisoformat(row["ingestion_timestamp"]),
-        hardware_profile=HardwareProfile(row["hardware_profile"]),
+        hardware_profile=row["hardware_profile"],
         column_map=ColumnMap.model_validate_json(row["column_map"]),
         encoding_detected=row["encoding_detected"],
         low_confidence_flag=bool(row["low_confidence_flag"]),
@@ -221,11 +269,16 @@ def create_measurement(measurement: Measurement) -> Measurement:
                 measurement.column_map.model_dump_json() if measurement.column_map else None,
             )
         )
+    _cache_put("measurement", measurement.id, measurement)
     return measurement
 
 
 def get_measurement(measurement_id: UUID) -> Optional[Measurement]:
     """Fetch Measurement by ID."""
+    cached = _cache_get("measurement", measurement_id)
+    if cached is not None:
+        return cached
+    
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
@@ -235,7 +288,9 @@ def get_measurement(measurement_id: UUID) -> Optional[Measurement]:
         row = cursor.fetchone()
         if row is None:
             return None
-        return _row_to_measurement(row)
+        entity = _row_to_measurement(row)
+    _cache_put("measurement", measurement_id, entity)
+    return entity
 
 
 def list_measurements_for_import(import_record_id: UUID) -> list[Measurement]:
@@ -251,7 +306,6 @@ def list_measurements_for_import(import_record_id: UUID) -> list[Measurement]:
 
 def _row_to_measurement(row: sqlite3.Row) -> Measurement:
     """Convert database row to Measurement."""
-    from backend.models.entities import MeasurementMetadata, ColumnMap
     return Measurement(
         id=UUID(row["id"]),
         import_record_id=UUID(row["import_record_id"]),
@@ -277,8 +331,9 @@ def create_analysis(analysis: Analysis) -> Analysis:
             """
             INSERT INTO analyses 
             (id, measurement_id, timestamp, mode, status, 
-             solver_config, parameters, result_hash, masks_applied, error_message)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             solver_config, parameters, result_hash, masks_applied, error_message,
+             fitted_current)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 str(analysis.id),
@@ -291,13 +346,19 @@ def create_analysis(analysis: Analysis) -> Analysis:
                 analysis.result_hash,
                 json.dumps(analysis.masks_applied),
                 analysis.error_message,
+                analysis.fitted_current,
             )
         )
+    _cache_put("analysis", analysis.id, analysis)
     return analysis
 
 
 def get_analysis(analysis_id: UUID) -> Optional[Analysis]:
     """Fetch Analysis by ID."""
+    cached = _cache_get("analysis", analysis_id)
+    if cached is not None:
+        return cached
+    
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
@@ -307,7 +368,9 @@ def get_analysis(analysis_id: UUID) -> Optional[Analysis]:
         row = cursor.fetchone()
         if row is None:
             return None
-        return _row_to_analysis(row)
+        entity = _row_to_analysis(row)
+    _cache_put("analysis", analysis_id, entity)
+    return entity
 
 
 def list_analyses_for_measurement(measurement_id: UUID) -> list[Analysis]:
@@ -323,20 +386,18 @@ def list_analyses_for_measurement(measurement_id: UUID) -> list[Analysis]:
 
 def _row_to_analysis(row: sqlite3.Row) -> Analysis:
     """Convert database row to Analysis."""
-    from backend.models.entities import (
-        AnalysisMode, AnalysisStatus, ExtractedParameters, SolverConfig
-    )
     return Analysis(
         id=UUID(row["id"]),
         measurement_id=UUID(row["measurement_id"]),
         timestamp=datetime.fromisoformat(row["timestamp"]),
-        mode=AnalysisMode(row["mode"]),
-        status=AnalysisStatus(row["status"]),
+        mode=row["mode"],
+        status=row["status"],
         solver_config=SolverConfig.model_validate_json(row["solver_config"]),
         parameters=ExtractedParameters.model_validate_json(row["parameters"]) if row["parameters"] else None,
         result_hash=row["result_hash"],
         masks_applied=json.loads(row["masks_applied"]),
         error_message=row["error_message"],
+        fitted_current=row["fitted_current"],
     )
 
 
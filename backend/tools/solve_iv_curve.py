@@ -64,11 +64,15 @@ def one_diode_equation(
     Vt = K_BOLTZMANN * T_k / Q_ELECTRON
     I = np.zeros_like(V, dtype=np.float64)
     
+    # Loop invariants, hoisted without changing evaluation order (bit-identical)
+    n_Vt = n * Vt
+    Rs_over_Rsh = R_s / R_sh
+    
     for iteration in range(50):
-        exponential_term = np.clip((V + I * R_s) / (n * Vt), -50, 50)
-        exp_val = np.exp(exponential_term)
-        f = I_ph - I_0 * (exp_val - 1) - (V + I * R_s) / R_sh - I
-        df = -I_0 * exp_val * R_s / (n * Vt) - R_s / R_sh - 1
+        V_j = V + I * R_s
+        exp_val = np.exp(np.clip(V_j / n_Vt, -50, 50))
+        f = I_ph - I_0 * (exp_val - 1) - V_j / R_sh - I
+        df = -I_0 * exp_val * R_s / n_Vt - Rs_over_Rsh - 1
         I_new = I - f / df
         if np.max(np.abs(I_new - I)) < 1e-12:
             break
@@ -91,12 +95,16 @@ def two_diode_equation(
     Vt = K_BOLTZMANN * T_k / Q_ELECTRON
     I = np.zeros_like(V, dtype=np.float64)
     
+    n1_Vt = n1 * Vt
+    n2_Vt = n2 * Vt
+    Rs_over_Rsh = R_s / R_sh
+    
     for iteration in range(50):
         V_j = V + I * R_s
-        exp1 = np.exp(np.clip(V_j / (n1 * Vt), -50, 50))
-        exp2 = np.exp(np.clip(V_j / (n2 * Vt), -50, 50))
+        exp1 = np.exp(np.clip(V_j / n1_Vt, -50, 50))
+        exp2 = np.exp(np.clip(V_j / n2_Vt, -50, 50))
         f = I_ph - I_01 * (exp1 - 1) - I_02 * (exp2 - 1) - V_j / R_sh - I
-        df = (-I_01 * exp1 * R_s / (n1 * Vt) - I_02 * exp2 * R_s / (n2 * Vt) - R_s / R_sh - 1)
+        df = (-I_01 * exp1 * R_s / n1_Vt - I_02 * exp2 * R_s / n2_Vt - Rs_over_Rsh - 1)
         I_new = I - f / df
         if np.max(np.abs(I_new - I)) < 1e-12:
             break
@@ -177,9 +185,15 @@ def solve_iv_curve(
     model_type: ModelType = ModelType.ONE_DIODE,
     measurement_type: MeasurementType = MeasurementType.LIGHT,
     measurement_id: Optional[str] = None,
+    initial_guess: Optional[np.ndarray] = None,
 ) -> tuple[ExtractedParameters, SolverConfig, str]:
     """
     Solve IV curve using physics-based model.
+    
+    In Exploration mode, an initial_guess (solver-space vector, see
+    parameters_to_initial_guess) seeds the global search as a member of its
+    initial population, so a previous optimum is kept unless DE finds a
+    better one. Reference mode always runs the full, reproducible pipeline.
     """
     # MANDATORY: Ensure float64 per Solver Spec §1.2
     V = np.asarray(V, dtype=np.float64)
@@ -243,22 +257,34 @@ def solve_iv_curve(
         cost_func = lambda p, v, i: _two_diode_cost(p, v, i, sm)
         residual_func = lambda p, v, i: _two_diode_residuals(p, v, i, sm)
 
+    lb = [b[0] for b in bounds]
+    ub = [b[1] for b in bounds]
+    
+    # Stage A: Global Search, seeded with a previous optimum of this
+    # measurement when one is available
+    seed_x0 = None
+    if (
+        initial_guess is not None
+        and mode == AnalysisMode.EXPLORATION
+        and len(initial_guess) == len(bounds)
+    ):
+        seed_x0 = np.clip(np.asarray(initial_guess, dtype=np.float64), lb, ub)
     de_result = differential_evolution(
         cost_func,
         bounds=bounds,
         args=(V, I_fit),
+        x0=seed_x0,
         **de_config,
     )
+    x0 = de_result.x
     print(f"  [DEBUG] Global Opt Done. Success: {de_result.success}", flush=True)
     
     # Stage B: Local Refinement
-    lb = [b[0] for b in bounds]
-    ub = [b[1] for b in bounds]
     
     print(f"  [DEBUG] Starting Local Refinement...", flush=True)
     lm_result = least_squares(
         residual_func,
-        x0=de_result.x,
+        x0=x0,
         args=(V, I_fit),
         bounds=(lb, ub),
         method="trf",
@@ -363,24 +389,86 @@ def _two_diode_residuals(params, V, I_measured, T_k):
     return I_measured - I_model
 
 
+def reconstruct_fitted_current(
+    V: np.ndarray,
+    params: ExtractedParameters,
+    model_type: ModelType,
+    cell_area_cm2: float,
+    temperature_c: float,
+) -> np.ndarray:
+    """Evaluate the fitted model on V in absolute units (A)."""
+    T_k = temperature_c + 273.15
+    
+    if model_type == ModelType.ONE_DIODE:
+        return one_diode_equation(
+            V=V,
+            I_ph=params.i_ph,
+            I_0=params.i_0,
+            n=params.n_ideality,
+            R_s=params.r_s / cell_area_cm2,
+            R_sh=params.r_sh / cell_area_cm2,
+            T_k=T_k,
+        )
+    return two_diode_equation(
+        V=V,
+        I_ph=params.i_ph,
+        I_01=params.i_0,
+        n1=params.n_ideality,
+        I_02=0.0,
+        n2=params.n2_ideality or 2.0,
+        R_s=params.r_s / cell_area_cm2,
+        R_sh=params.r_sh / cell_area_cm2,
+        T_k=T_k,
+    )
+
+
+def parameters_to_initial_guess(
+    params: ExtractedParameters,
+    cell_area_cm2: float,
+    measurement_type: MeasurementType = MeasurementType.LIGHT,
+) -> np.ndarray:
+    """
+    Map one-diode ExtractedParameters back to the solver vector.
+    
+    Inverse of the area normalization in solve_iv_curve; dark fits search
+    log10(I_0) with I_ph fixed at zero.
+    """
+    R_s = params.r_s / cell_area_cm2
+    R_sh = params.r_sh / cell_area_cm2
+    if measurement_type == MeasurementType.DARK:
+        return np.array([np.log10(params.i_0), params.n_ideality, R_s, R_sh], dtype=np.float64)
+    return np.array([params.i_ph, params.i_0, params.n_ideality, R_s, R_sh], dtype=np.float64)
+
+
 def analyze_measurement(
     measurement: Measurement,
     V: np.ndarray,
     I: np.ndarray,
     mode: AnalysisMode,
     model_type: ModelType = ModelType.ONE_DIODE,
+    area_cm2_override: Optional[float] = None,
+    temperature_c_override: Optional[float] = None,
+    initial_guess: Optional[np.ndarray] = None,
 ) -> Analysis:
-    """Run full analysis and persist."""
+    """
+    Run full analysis and persist.
+    
+    Overrides replace the stored metadata area/temperature for this fit only.
+    """
+    metadata = measurement.metadata
+    cell_area_cm2 = metadata.cell_area_cm2 if area_cm2_override is None else area_cm2_override
+    temperature_c = metadata.temperature_c if temperature_c_override is None else temperature_c_override
     try:
         params, config, result_hash = solve_iv_curve(
             V=V,
             I=I,
-            cell_area_cm2=measurement.metadata.cell_area_cm2,
-            temperature_c=measurement.metadata.temperature_c,
+            cell_area_cm2=cell_area_cm2,
+            temperature_c=temperature_c,
             mode=mode,
             model_type=model_type,
-            measurement_type=measurement.metadata.measurement_type,
+            measurement_type=metadata.measurement_type,
             measurement_id=str(measurement.id),
+            initial_guess=initial_guess,
         )
         status = AnalysisStatus.VALID
         err = None
@@ -390,6 +478,12 @@ def analyze_measurement(
         result_hash = None
         status = AnalysisStatus.INVALID
         err = str(e)
+    
+    fitted_current = None
+    if params is not None:
+        fitted_current = reconstruct_fitted_current(
+            np.asarray(V, dtype=np.float64), params, model_type, cell_area_cm2, temperature_c
+        ).tobytes()
         
     analysis = Analysis(
         measurement_id=measurement.id,
@@ -399,5 +493,7 @@ def analyze_measurement(
         parameters=params,
         result_hash=result_hash,
         error_message=err,
+        fitted_current=fitted_current,
     )
     return create_analysis(analysis)
+